@@ -0,0 +1,105 @@
+from fastapi import HTTPException, status
+
+
+def parse_names(value: str | None) -> list[str] | None:
+    """
+        "a, b,c" -> ["a", "b", "c"]; None stays None (parameter not given)
+    """
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class Selection:
+    """
+        What one request asked for: scalar fields (None = all) and relations
+    """
+
+    def __init__(self, fieldset: "FieldSet", fields: frozenset | None, relations: frozenset):
+        self.fieldset = fieldset
+        self.fields = fields
+        self.relations = relations
+
+    @property
+    def include(self) -> dict | None:
+        """
+            Prisma `include` argument for the selected relations
+        """
+        if not self.relations:
+            return None
+        return {relation: True for relation in sorted(self.relations)}
+
+    def client(self, model, db):
+        """
+            The narrowest registered partial that covers the selected fields,
+            or the full model when relations or all fields are requested
+        """
+        if self.fields is None or self.relations:
+            return model
+
+        needed = self.fields | self.fieldset.required
+        for partial, partial_fields in self.fieldset.partials:
+            if needed <= partial_fields:
+                return partial.prisma(db)
+        return model
+
+    def project(self, record):
+        """
+            Trim a loaded record to the selected fields and relations
+
+            Without `fields=` the record is returned untouched, so routes keep
+            their existing response shape.
+        """
+        if record is None or self.fields is None:
+            return record
+        return record.model_dump(include=set(self.fields | self.relations | {"id"}))
+
+
+class FieldSet:
+    """
+        Per-route whitelist for `fields=` and `include=` query parameters
+
+        - **fields**: scalar fields a client may select
+        - **relations**: relations a client may include
+        - **default_relations**: included when `include=` is not given
+        - **required**: fields the route itself reads (auth checks, cursors);
+          always fetched, only returned when selected
+        - **partials**: generated partial models to query through when they
+          cover the selection, narrowest first
+    """
+
+    def __init__(
+            self,
+            fields,
+            relations=(),
+            default_relations=(),
+            required=(),
+            partials=()
+    ):
+        self.fields = frozenset(fields)
+        self.relations = frozenset(relations)
+        self.default_relations = frozenset(default_relations)
+        self.required = frozenset(required)
+        self.partials = [(partial, frozenset(partial.model_fields)) for partial in partials]
+
+    def select(self, fields: str | None = None, include: str | None = None) -> Selection:
+        """
+            Validate the query parameters against the whitelist; 400 on
+            anything not on it
+        """
+        field_names = parse_names(fields)
+        relation_names = parse_names(include)
+
+        unknown = sorted(set(field_names or ()) - self.fields)
+        unknown += sorted(set(relation_names or ()) - self.relations)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown field or include: {', '.join(unknown)}"
+            )
+
+        return Selection(
+            self,
+            frozenset(field_names) if field_names is not None else None,
+            frozenset(relation_names) if relation_names is not None else self.default_relations
+        )
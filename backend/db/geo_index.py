@@ -0,0 +1,155 @@
+from dotenv import load_dotenv
+from itertools import chain
+import math
+import os
+import time
+
+load_dotenv()
+GEO_CELL_DEGREES = float(os.getenv("GEO_CELL_DEGREES", "0.25"))
+GEO_INDEX_REFRESH_SECONDS = float(os.getenv("GEO_INDEX_REFRESH_SECONDS", "300"))
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+        Great-circle distance between two points in kilometres
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = math.radians(lat2 - lat1)
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class EventGeoIndex:
+    """
+        In-process grid of event coordinates for radius / nearest-N lookups
+
+        Events are bucketed into cells of cell_degrees x cell_degrees. A query
+        only scans the cells overlapping its search radius, then ranks the
+        candidates by exact haversine distance. The event routes keep the grid
+        current on create/update/delete; a periodic rebuild picks up changes
+        made by other workers.
+    """
+
+    def __init__(self, cell_degrees: float = GEO_CELL_DEGREES, refresh_seconds: float = GEO_INDEX_REFRESH_SECONDS):
+        self.cell_degrees = cell_degrees
+        self.refresh_seconds = refresh_seconds
+        self._cells = {}
+        self._points = {}
+        self._built_at = None
+
+    @property
+    def lon_cell_count(self) -> int:
+        return math.ceil(360.0 / self.cell_degrees)
+
+    def _lon_cell(self, lon: float) -> int:
+        # Longitudes are taken modulo 360, so -180 and 180 share a cell;
+        # the min() guards tiny negatives that round up to exactly 360.0
+        return min(math.floor((lon % 360.0) / self.cell_degrees), self.lon_cell_count - 1)
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return (math.floor(lat / self.cell_degrees), self._lon_cell(lon))
+
+    def __len__(self):
+        return len(self._points)
+
+    @property
+    def is_stale(self) -> bool:
+        return self._built_at is None or time.monotonic() - self._built_at > self.refresh_seconds
+
+    def rebuild(self, events):
+        self._cells = {}
+        self._points = {}
+        for event in events:
+            self.upsert(event.id, event.latitude, event.longitude)
+        self._built_at = time.monotonic()
+
+    def upsert(self, event_id: str, latitude: float | None, longitude: float | None):
+        self.remove(event_id)
+        if latitude is None or longitude is None:
+            return
+
+        cell = self._cell(latitude, longitude)
+        self._points[event_id] = (latitude, longitude, cell)
+        self._cells.setdefault(cell, set()).add(event_id)
+
+    def remove(self, event_id: str):
+        point = self._points.pop(event_id, None)
+        if point is None:
+            return
+
+        bucket = self._cells.get(point[2])
+        if bucket is not None:
+            bucket.discard(event_id)
+            if not bucket:
+                del self._cells[point[2]]
+
+    def _lon_cells_within(self, lon: float, lon_span: float):
+        """
+            Longitude cells overlapping lon ± lon_span, wrapping across the
+            antimeridian instead of running off the end of the grid
+        """
+        if lon_span * 2 >= 360.0:
+            return range(self.lon_cell_count)
+
+        start = (lon - lon_span) % 360.0
+        end = start + lon_span * 2
+        if end < 360.0:
+            return range(self._lon_cell(start), self._lon_cell(end) + 1)
+        return chain(range(self._lon_cell(start), self.lon_cell_count), range(self._lon_cell(end - 360.0) + 1))
+
+    def _cells_within(self, lat: float, lon: float, radius_km: float):
+        lat_span = radius_km / 111.32
+        # Longitude degrees shrink towards the poles, so size the span at the
+        # search band's poleward edge; a band that reaches a pole spans every
+        # longitude
+        edge_lat = abs(lat) + lat_span
+        if edge_lat >= 90.0:
+            lon_span = 180.0
+        else:
+            lon_span = radius_km / (111.32 * max(math.cos(math.radians(edge_lat)), 0.01))
+
+        min_lat = math.floor(max(lat - lat_span, -90.0) / self.cell_degrees)
+        max_lat = math.floor(min(lat + lat_span, 90.0) / self.cell_degrees)
+        lon_cells = list(self._lon_cells_within(lon, lon_span))
+
+        for cell_lat in range(min_lat, max_lat + 1):
+            for cell_lon in lon_cells:
+                bucket = self._cells.get((cell_lat, cell_lon))
+                if bucket:
+                    yield bucket
+
+    def within_radius(self, lat: float, lon: float, radius_km: float, limit: int | None = None) -> list[tuple[str, float]]:
+        """
+            Return (event_id, distance_km) pairs inside radius_km, nearest first
+        """
+        matches = []
+        for bucket in self._cells_within(lat, lon, radius_km):
+            for event_id in bucket:
+                point_lat, point_lon, _ = self._points[event_id]
+                distance = haversine_km(lat, lon, point_lat, point_lon)
+                if distance <= radius_km:
+                    matches.append((event_id, distance))
+
+        matches.sort(key=lambda match: match[1])
+        return matches[:limit] if limit is not None else matches
+
+
+event_geo_index = EventGeoIndex()
+
+
+async def ensure_event_geo_index(db):
+    """
+        (Re)build the grid from the events collection when empty or stale
+    """
+    if event_geo_index.is_stale:
+        events = await db.events.find_many(
+            where={
+                "latitude": {"not": None},
+                "longitude": {"not": None}
+            }
+        )
+        event_geo_index.rebuild(events)
+    return event_geo_index
@@ -0,0 +1,97 @@
+from fastapi import HTTPException, status
+from datetime import datetime
+import base64
+import binascii
+import json
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def clamp_page_size(limit: int | None) -> int:
+    """
+        Keep page sizes between 1 and MAX_PAGE_SIZE
+    """
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(sort_value: datetime, record_id: str) -> str:
+    """
+        Build an opaque cursor from the last row's sort key and id
+    """
+    raw = json.dumps({"v": sort_value.isoformat(), "i": record_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """
+        Reverse encode_cursor, raising a 400 for anything malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["v"]), str(data["i"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def keyset_where(where: dict | None, cursor: str | None, sort_field: str = "createdAt", direction: str = "desc") -> dict:
+    """
+        Combine a route's filters with the "after this cursor" condition
+    """
+    where = dict(where or {})
+    if not cursor:
+        return where
+
+    sort_value, record_id = decode_cursor(cursor)
+    op = "lt" if direction == "desc" else "gt"
+    after_cursor = {
+        "OR": [
+            {sort_field: {op: sort_value}},
+            {sort_field: sort_value, "id": {op: record_id}}
+        ]
+    }
+
+    if not where:
+        return after_cursor
+    return {"AND": [where, after_cursor]}
+
+
+async def paginate(
+    model,
+    cursor: str | None = None,
+    limit: int | None = DEFAULT_PAGE_SIZE,
+    where: dict | None = None,
+    include: dict | None = None,
+    sort_field: str = "createdAt",
+    direction: str = "desc"
+) -> tuple[list, str | None]:
+    """
+        Keyset pagination over (sort_field, id)
+
+        Reads one extra row to know whether another page exists and returns
+        (items, next_cursor). next_cursor is None on the last page.
+    """
+    page_size = clamp_page_size(limit)
+
+    query = {
+        "where": keyset_where(where, cursor, sort_field, direction),
+        "order": [{sort_field: direction}, {"id": direction}],
+        "take": page_size + 1
+    }
+    if include:
+        query["include"] = include
+
+    rows = await model.find_many(**query)
+
+    if len(rows) <= page_size:
+        return rows, None
+
+    items = rows[:page_size]
+    last = items[-1]
+    return items, encode_cursor(getattr(last, sort_field), last.id)
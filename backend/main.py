@@ -14,7 +14,15 @@ from backend.routers.volunteer import router as volunteer_router
 from backend.routers.volunteer_opportunity import router as opportunities_router
 from backend.db.prisma_client import db
 from backend.routers.notifications import start_scheduler, scheduler
+from backend.routers.auth.hashing import password_hasher
 from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+# Reminders and email delivery normally run in `python -m backend.worker`;
+# set this to run them inside the API process instead (single-process dev)
+RUN_WORKER_IN_API = os.getenv("RUN_WORKER_IN_API", "false").lower() == "true"
 
 # When we start the app, connect to the db. When we shut down the app, disconnect
 # @app.on_event("startup")
@@ -22,15 +30,18 @@ from contextlib import asynccontextmanager
 async def lifespan(app:FastAPI):
     await db.connect()
 
-    # Start APScheduler here:
-    start_scheduler()
+    # Start APScheduler here when the API also acts as the worker:
+    if RUN_WORKER_IN_API:
+        start_scheduler()
     yield
 
 # @asynccontextmanager
 # async def shutdown(app:FastAPI):
 #     # Shutdown APScheduler:
 
-    scheduler.shutdown(wait=False)
+    if RUN_WORKER_IN_API:
+        scheduler.shutdown(wait=False)
+    password_hasher.shutdown()
     await db.disconnect()
 
 
@@ -170,6 +170,13 @@ class NotificationUpdate(BaseModel):
     isRead: Optional[bool] = Field(default=None)
     userId: Optional[str] = Field(default=None)
 
+class NotificationMarkRead(BaseModel):
+    ids: Optional[list[str]] = Field(
+        default=None,
+        max_length=500,
+        description="Notifications to mark read; omit to mark all read"
+    )
+
 #! Jobs
 class Jobs(BaseModel):
     id: str
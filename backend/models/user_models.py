@@ -97,6 +97,11 @@ class UserUpdateResponse(BaseModel):
     message: str
     user: UserResponse
 
+class UserListResponse(BaseModel):
+    """Response model for a page of users"""
+    users: List[UserResponse]
+    next_cursor: Optional[str] = None
+
 # * Volunteer models ==========================================
 class AvailabilityDays(str, Enum):
     WEEKDAYS = "Weekdays"
@@ -0,0 +1,38 @@
+"""
+    Partial models generated alongside the Prisma client (`prisma generate`)
+
+    Querying through a partial, e.g. `UserRecipient.prisma(db).find_many(...)`,
+    only selects the fields listed here.
+"""
+from prisma.models import Users, Children, Volunteers, Events, BroadcastNotifications
+
+# Just enough of a user to address an email or notification
+Users.create_partial("UserRecipient", include={"id", "email", "firstName"})
+
+# Used to walk from enrolled children / volunteers to the users to notify
+Children.create_partial("ChildParents", include={"id", "parentIDs"})
+Volunteers.create_partial("VolunteerAccount", include={"id", "userId"})
+
+# Just what the notification inbox and bell need about a user
+Users.create_partial("UserInbox", include={"id", "createdAt", "unreadNotifications", "readBroadcasts"})
+BroadcastNotifications.create_partial("BroadcastStamp", include={"id", "createdAt"})
+
+# Card views; routes query through these when `fields=` fits inside them
+# (see backend/db/fieldsets.py)
+Events.create_partial("EventCard", include={
+    "id", "name", "date", "image", "city", "state", "startTime", "endTime",
+    "participants", "limit", "openSeats", "activityId", "createdAt",
+    "reviewCount", "averageRating"
+})
+Children.create_partial("ChildCard", include={
+    "id", "firstName", "lastName", "preferredName", "grade", "birthday", "parentIDs"
+})
+Users.create_partial("UserCard", include={
+    "id", "firstName", "lastName", "avatar", "role", "createdAt"
+})
+
+# Rebuilding review aggregates (routers/review_stats.py)
+Events.create_partial("EventRatings", include={
+    "id", "activityId", "reviewCount", "ratingSum",
+    "rating1Count", "rating2Count", "rating3Count", "rating4Count", "rating5Count", "averageRating"
+})
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, status, Depends, HTTPException, Security
+from fastapi import APIRouter, status, Depends, HTTPException, Security, Request
 from backend.db.prisma_client import db
 from typing import Annotated
 from backend.models.interaction_models import ActivityCreate, ActivityUpdate
-from backend.models.user_models import User
-from .auth.login import get_current_user
+from .auth.login import get_current_principal, Principal
 from .auth.utils import enforce_admin, enforce_authentication
+from .response_cache import cached_json_response, bump_collection_version
 
 
 router = APIRouter()
@@ -13,7 +13,7 @@ router = APIRouter()
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def create_activity(
     activity_data: ActivityCreate,
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_principal)]
 ):
     """
     Create Activity
@@ -52,6 +52,7 @@ async def create_activity(
                 "description": activity_data.description
             }
         )
+        bump_collection_version("activities")
 
     except Exception as e:
         raise HTTPException(
@@ -63,7 +64,7 @@ async def create_activity(
 
 
 @router.get("", status_code=status.HTTP_200_OK)
-async def get_all_activities():
+async def get_all_activities(request: Request):
 
     """
     Get All Activities
@@ -72,10 +73,14 @@ async def get_all_activities():
     Returns: "activities": {activities}
     """
 
-    try:
+    async def load_activities():
         activities = await db.activities.find_many(
             include={"events": True}
         )
+        return {"activities": activities}
+
+    try:
+        return await cached_json_response(request, "get_all_activities", ("activities", "events"), load_activities)
 
     except Exception as e:
         raise HTTPException(
@@ -83,24 +88,24 @@ async def get_all_activities():
             detail=f"Failed to fetch activities: {str(e)}"
         )
 
-    return {"activities": activities}
-
 
 @router.get("/with-events", status_code=200)
-async def get_all_activities_with_events():
+async def get_all_activities_with_events(request: Request):
     """
     Get all Activities with their associated Events
     
     Returns a list of activites, each bundled with its events
     """
     
-    try:
+    async def load_activities():
         activities = await db.activities.find_many(
             include={"events": True},
             order={"name": "asc"} # order alphabetically??
         )
-        
         return {"activities": activities}
+
+    try:
+        return await cached_json_response(request, "get_all_activities_with_events", ("activities", "events"), load_activities)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -133,7 +138,7 @@ async def get_activity(activity_id: str):
 async def update_activity(
     activity_id: str,
     activity_data: ActivityUpdate,
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_principal)]
 ):
     """
     Update Activity
@@ -168,6 +173,7 @@ async def update_activity(
             where={"id": activity_id},
             data=activity_data.dict(exclude_unset=True)
         )
+        bump_collection_version("activities")
 
     except Exception as e:
         raise HTTPException(
@@ -181,7 +187,7 @@ async def update_activity(
 @router.delete("/{activity_id}", status_code=status.HTTP_200_OK)
 async def delete_activity(
     activity_id: str,
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_principal)]
 ):
     """
     Delete Activity
@@ -204,6 +210,7 @@ async def delete_activity(
         await db.activities.delete(
             where={"id": activity_id}
         )
+        bump_collection_version("activities")
 
     except Exception as e:
             raise HTTPException(
@@ -0,0 +1,85 @@
+from backend.db.prisma_client import db
+from prisma.partials import UserRecipient, ChildParents, VolunteerAccount
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+RECIPIENT_BATCH_SIZE = int(os.getenv("RECIPIENT_BATCH_SIZE", "500"))
+
+
+async def iter_user_batches(partial=UserRecipient, where: dict | None = None, batch_size: int = RECIPIENT_BATCH_SIZE):
+    """
+        Yield users in id order, `batch_size` at a time, projected to `partial`
+
+        Each batch resumes after the last id of the previous one, so walking
+        the whole user base holds one batch in memory and never skips or
+        repeats a user when accounts are added or removed mid-walk.
+    """
+    last_id = None
+    while True:
+        batch_where = dict(where or {})
+        if last_id is not None:
+            batch_where["id"] = {"gt": last_id}
+
+        batch = await partial.prisma(db).find_many(
+            where=batch_where,
+            order={"id": "asc"},
+            take=batch_size
+        )
+        if not batch:
+            return
+
+        yield batch
+        if len(batch) < batch_size:
+            return
+        last_id = batch[-1].id
+
+
+async def resolve_recipients(user_ids) -> list[UserRecipient]:
+    """
+        Load id/email/firstName for a set of user IDs in one query
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return []
+
+    return await UserRecipient.prisma(db).find_many(
+        where={"id": {"in": user_ids}}
+    )
+
+
+async def resolve_event_audience(
+        event,
+        users: bool = True,
+        parents: bool = False,
+        volunteers: bool = False
+) -> list[UserRecipient]:
+    """
+        Deduplicated recipients for an event
+
+        - **users**: users enrolled in the event
+        - **parents**: parents of the children enrolled in the event
+        - **volunteers**: the user accounts of the event's volunteers
+
+        Costs at most one projected query per collection instead of one
+        users lookup per recipient.
+    """
+    user_ids = []
+
+    if users:
+        user_ids.extend(event.userIDs or [])
+
+    if parents and event.childIDs:
+        children = await ChildParents.prisma(db).find_many(
+            where={"id": {"in": event.childIDs}}
+        )
+        for child in children:
+            user_ids.extend(child.parentIDs or [])
+
+    if volunteers and event.volunteerIDs:
+        accounts = await VolunteerAccount.prisma(db).find_many(
+            where={"id": {"in": event.volunteerIDs}}
+        )
+        user_ids.extend(account.userId for account in accounts)
+
+    return await resolve_recipients(user_ids)
@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from dotenv import load_dotenv
+import os
+import time
+
+load_dotenv()
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "1024"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+
+class PrincipalCache:
+    """
+        Bounded, TTL based cache of authenticated users keyed by the token's "sub"
+
+        Entries are evicted least-recently-used once max_size is reached and
+        expire after ttl_seconds. Handlers that change a user must call invalidate()
+    """
+
+    def __init__(self, max_size: int = PRINCIPAL_CACHE_MAX_SIZE, ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, sub: str):
+        entry = self._entries.get(sub)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del self._entries[sub]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(sub)
+        self.hits += 1
+        return user
+
+    def set(self, sub: str, user):
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+
+        self._entries[sub] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(sub)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, sub: str | None):
+        if sub is not None:
+            self._entries.pop(sub, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxSize": self.max_size,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRatio": self.hits / lookups if lookups else 0.0
+        }
+
+
+principal_cache = PrincipalCache()
+
+
+def invalidate_principal(email: str | None):
+    """
+        Drop a cached user so the next request reloads it from the database
+    """
+    principal_cache.invalidate(email)
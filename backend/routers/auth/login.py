@@ -1,4 +1,4 @@
-from fastapi import APIRouter, status, HTTPException, Depends
+from fastapi import APIRouter, status, HTTPException, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, OAuth2PasswordRequestForm
 from typing import Annotated
 import jwt
@@ -9,7 +9,10 @@ from backend.db.prisma_client import db
 from datetime import datetime, timedelta, timezone
 import os
 from dotenv import load_dotenv
-from .utils import verify_password
+from .utils import enforce_admin, enforce_authentication
+from .hashing import verify_password_async, password_hasher
+from .cache import principal_cache
+from ..response_cache import response_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,7 +26,7 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES'))
 oauth2_scheme = HTTPBearer()
 
 # For authentication of user by id
-security = HTTPBearer()
+security = oauth2_scheme
 
 # Router
 router = APIRouter()
@@ -36,7 +39,7 @@ async def authenticate_user(db, username: str, password: str):
 
     if not user:
         return False
-    if not verify_password(password, user.password):
+    if not await verify_password_async(password, user.password):
         return False
     return user
 
@@ -52,94 +55,155 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
-async def get_current_user(token: Annotated[HTTPAuthorizationCredentials, Depends(oauth2_scheme)]):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        username = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except InvalidTokenError:
-        raise credentials_exception
+def principal_claims(user) -> dict:
+    """
+    Claims embedded in access tokens so authorization checks can skip the DB
+    """
+    return {"sub": user.email, "id": user.id, "role": str(user.role)}
+
+
+async def load_user_by_email(email: str):
+    """
+    Resolve a token's "sub" to the full user, going through the principal cache
+    """
+    user = principal_cache.get(email)
+    if user is not None:
+        return user
+
     user = await db.users.find_unique(
-        where={"email": username}
+        where={"email": email}
     )
-    if user is None:
-        raise credentials_exception
+    if user is not None:
+        principal_cache.set(email, user)
     return user
 
-async def get_current_active_user(
-    current_user: Annotated[User, Depends(get_current_user)],
-):
-    return current_user
-
 
-async def get_current_user_by_email(credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)]):
+class Principal:
     """
-    Extract and validate JWT token, return current user
+    Lightweight authenticated identity built from the JWT claims alone
+
+    Carries only what enforce_authentication / enforce_admin need.
+    Use `await principal.load_user()` when a handler needs the full record.
     """
-    credentials_exception = HTTPException(
+
+    __slots__ = ("id", "email", "role", "_user")
+
+    def __init__(self, id: str, email: str, role: str, user=None):
+        self.id = id
+        self.email = email
+        self.role = role
+        self._user = user
+
+    async def load_user(self):
+        if self._user is None:
+            self._user = await load_user_by_email(self.email)
+        return self._user
+
+    def __repr__(self):
+        return f"Principal(id={self.id!r}, email={self.email!r}, role={self.role!r})"
+
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        # Extract token from credentials
-        token = credentials.credentials
-        logger.debug(f'Decoding token: {token[:20]}...')
-
-        # Decode JWT token
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        logger.debug(f'Token Payload: {payload}')
-
-
-        # Get user identifier from token
-        user_identifier = payload.get("sub")
-        if user_identifier is None:
-            logger.error("No 'sub' field in token payload")
-            raise credentials_exception
-        
-        
-        # Clean whitespace and normalize
-        user_identifier = user_identifier.strip()
-        
-        logger.debug(f'Looking up user with identifier: {user_identifier}')
 
+def decode_token_payload(request: Request, token: HTTPAuthorizationCredentials) -> dict:
+    """
+    Decode the bearer token once per request and memoize the payload on request.state
+    """
+    payload = getattr(request.state, "token_payload", None)
+    if payload is not None:
+        return payload
+
+    try:
+        logger.debug(f'Decoding token: {token.credentials[:20]}...')
+        payload = jwt.decode(token.credentials, SECRET_KEY, algorithms=[ALGORITHM])
     except InvalidTokenError as e:
         logger.error(f'Token validation failed: {str(e)}')
-        raise credentials_exception
-    
-    except Exception as e:
-        logger.error(f'Unexpected error decoding token: {str(e)}')
-        raise credentials_exception
-    
-    try:
-        # OPTION A: If JWT 'sub' contains user ID
-        user = await db.users.find_unique(
-            where={"email":user_identifier}
-        )
+        raise credentials_exception()
+
+    email = payload.get("sub")
+    if email is None:
+        logger.error("No 'sub' field in token payload")
+        raise credentials_exception()
+
+    # Clean whitespace and normalize
+    payload["sub"] = email.strip()
+
+    request.state.token_payload = payload
+    return payload
+
+
+async def get_current_user(
+    request: Request,
+    token: Annotated[HTTPAuthorizationCredentials, Depends(oauth2_scheme)]
+):
+    """
+    Single auth dependency: extract and validate the JWT, return the current user
 
-        if user is None:
-            logger.error(f"User not found with identifier: {user_identifier}")
-            raise credentials_exception
-    
-        logger.debug(f"Successfully found user: {user.email}")
+    The user is memoized on request.state, so every dependency in one request
+    shares one decode and at most one lookup.
+    """
+    user = getattr(request.state, "current_user", None)
+    if user is not None:
         return user
-    
+
+    payload = decode_token_payload(request, token)
+
+    try:
+        user = await load_user_by_email(payload["sub"])
     except Exception as e:
         logger.debug(f'Database error looking up user: {str(e)}')
-        raise credentials_exception
-    
-async def get_current_active_user_by_email(
-        current_user: Annotated[User, Depends(get_current_user_by_email)]
+        raise credentials_exception()
+
+    if user is None:
+        logger.error(f"User not found with identifier: {payload['sub']}")
+        raise credentials_exception()
+
+    request.state.current_user = user
+    return user
+
+
+async def get_current_principal(
+    request: Request,
+    token: Annotated[HTTPAuthorizationCredentials, Depends(oauth2_scheme)]
+):
+    """
+    Authenticate from the token claims without touching the database
+
+    Tokens minted before id/role claims were added fall back to get_current_user.
+    """
+    principal = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal
+
+    payload = decode_token_payload(request, token)
+    user_id = payload.get("id")
+    role = payload.get("role")
+
+    if user_id and role:
+        principal = Principal(user_id, payload["sub"], role, getattr(request.state, "current_user", None))
+    else:
+        user = await get_current_user(request, token)
+        principal = Principal(user.id, user.email, str(user.role), user)
+
+    request.state.principal = principal
+    return principal
+
+async def get_current_active_user(
+    current_user: Annotated[User, Depends(get_current_user)],
 ):
     return current_user
 
+
+# Kept as aliases so existing routers resolve to the same memoized dependency
+get_current_user_by_email = get_current_user
+get_current_active_user_by_email = get_current_active_user
+
 @router.post("/token")
 async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
     email = form_data.username
@@ -155,7 +219,7 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data=principal_claims(user), expires_delta=access_token_expires
     )
 
     return {"access_token": access_token, "token_type": "bearer"}
@@ -164,3 +228,18 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
 async def read_users_me(current_user: Annotated[User, Depends(get_current_active_user)]):
     return current_user
 
+@router.get("/cache-stats")
+async def read_principal_cache_stats(current_user: Annotated[User, Depends(get_current_active_user)]):
+    """
+    Hit/miss counters for the authenticated user and response caches,
+    and queue metrics for the password hashing pool (admin only)
+    """
+    enforce_authentication(current_user, "view cache stats")
+    enforce_admin(current_user, "view cache stats")
+
+    return {
+        "principalCache": principal_cache.stats(),
+        "passwordHasher": password_hasher.stats(),
+        "responseCache": response_cache.stats()
+    }
+
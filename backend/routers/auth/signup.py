@@ -4,8 +4,8 @@ from typing import List
 from backend.models.user_models import ChildCreate, Role
 from backend.db.prisma_client import db
 from datetime import datetime, timezone, timedelta, date
-from .utils import hash_password
-from .login import create_access_token
+from .hashing import hash_password_async
+from .login import create_access_token, principal_claims
 from dotenv import load_dotenv
 import os
 
@@ -53,7 +53,7 @@ async def signup(user: UserSignup):
         )
 
     # Hash the password
-    hashed_password = hash_password(user.password)
+    hashed_password = await hash_password_async(user.password)
 
     created_user = await db.users.create(
         data={
@@ -79,7 +79,7 @@ async def signup(user: UserSignup):
     # Generate Access token after signup
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": created_user.email},
+        data=principal_claims(created_user),
         expires_delta=access_token_expires
     )
 
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, status, Depends, HTTPException
 from backend.db.prisma_client import db
+from backend.db.fieldsets import FieldSet
+from prisma.partials import ChildCard
 from typing import Annotated
 from backend.models.user_models import User, ChildCreate, ChildUpdate, EmergencyContactCreate, EmergencyContactUpdate
 from fastapi.encoders import jsonable_encoder
@@ -11,6 +13,21 @@ from .auth.utils import enforce_authentication, enforce_admin
 router = APIRouter()
 
 
+# Selectable with ?fields= and ?include= on GET /child/{child_id};
+# parentIDs is always read for the access check
+CHILD_FIELDS = FieldSet(
+    fields={
+        "id", "firstName", "lastName", "preferredName", "homeschool", "grade", "birthday",
+        "allergiesMedical", "notes", "photoConsent", "waiver", "createdAt", "updatedAt",
+        "parentIDs", "eventIDs", "emergencyContactIDs"
+    },
+    relations={"parents", "events", "emergencyContacts"},
+    default_relations={"parents", "events", "emergencyContacts"},
+    required={"parentIDs"},
+    partials=(ChildCard,)
+)
+
+
 # ! Create Child
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def create_child(
@@ -146,19 +163,22 @@ async def get_children(
 async def get_child_by_id(
     child_id: str,
     # Get the current user for security
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[User, Depends(get_current_user)],
+    fields: str | None = None,
+    include: str | None = None
 ):
+    """
+        Get a child with their parents, events and emergency contacts, or
+        only the ?fields= / ?include= asked for
+    """
 
     enforce_authentication(current_user, "access your child's information")
 
-    child = await db.children.find_unique(
+    selection = CHILD_FIELDS.select(fields, include)
+
+    child = await selection.client(db.children, db).find_unique(
         where={"id": child_id},
-        include={
-            # Include the child's parents and their events
-            "parents": True,
-            "events": True,
-            "emergencyContacts": True
-        }
+        include=selection.include
     )
 
     if not child:
@@ -174,7 +194,7 @@ async def get_child_by_id(
             detail="Access denied: You are not a parent of this child."
         )
 
-    return child
+    return selection.project(child)
 
 # ! Get children of an event
 @router.get("/event", status_code=status.HTTP_200_OK)
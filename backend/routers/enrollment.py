@@ -0,0 +1,316 @@
+from backend.db.prisma_client import db
+from fastapi import BackgroundTasks
+from .auth.utils import convert_iso_date_to_string
+from .notifications import schedule_reminder
+from .outbox import enqueue_email, email_key
+from .inbox import create_notification
+from .message_templates import render, render_summary, WaitlistContext
+from datetime import datetime, timedelta, timezone
+import uuid
+
+
+# =======================================================
+async def reserve_user_seat(event_id: str, user_id: str) -> bool:
+    """
+        Atomically take one seat for a user
+
+        A single conditional update_many only matches while the event has an
+        open seat and the user is not already enrolled, so concurrent joins
+        can never oversell the event or enroll the same user twice.
+    """
+    reserved = await db.events.update_many(
+        where={
+            "id": event_id,
+            "openSeats": {"gte": 1},
+            "NOT": [{"userIDs": {"has": user_id}}]
+        },
+        data={
+            "openSeats": {"decrement": 1},
+            "participants": {"increment": 1},
+            "userIDs": {"push": user_id}
+        }
+    )
+
+    if not reserved:
+        return False
+
+    await db.users.update(
+        where={"id": user_id},
+        data={"eventIDs": {"push": event_id}}
+    )
+    return True
+
+
+# =======================================================
+async def reserve_child_seats(event_id: str, child_ids: list[str]) -> bool:
+    """
+        Atomically take one seat per child, all or nothing
+    """
+    seats = len(child_ids)
+    reserved = await db.events.update_many(
+        where={
+            "id": event_id,
+            "openSeats": {"gte": seats},
+            "NOT": [{"childIDs": {"has_some": child_ids}}]
+        },
+        data={
+            "openSeats": {"decrement": seats},
+            "participants": {"increment": seats},
+            "childIDs": {"push": child_ids}
+        }
+    )
+
+    if not reserved:
+        return False
+
+    await db.children.update_many(
+        where={"id": {"in": child_ids}},
+        data={"eventIDs": {"push": event_id}}
+    )
+    return True
+
+
+# =======================================================
+# userIDs/childIDs can only be shrunk by writing the whole list, so a release
+# is conditioned on the list it was computed from and retried if a concurrent
+# join or leave changed it first
+RELEASE_ATTEMPTS = 5
+
+
+class SeatContention(Exception):
+    """
+        The enrollment list kept changing under a release; safe to retry
+    """
+
+
+async def release_user_seat(event_id: str, user_id: str) -> bool:
+    """
+        Atomically give back a user's seat
+
+        Returns False when the user is not (or no longer) enrolled, so two
+        concurrent leaves free the seat once.
+    """
+    for _ in range(RELEASE_ATTEMPTS):
+        event = await db.events.find_unique(where={"id": event_id})
+        if not event or user_id not in (event.userIDs or []):
+            return False
+
+        released = await db.events.update_many(
+            where={"id": event_id, "userIDs": {"equals": event.userIDs}},
+            data={
+                "userIDs": [uid for uid in event.userIDs if uid != user_id],
+                "participants": {"decrement": 1},
+                "openSeats": {"increment": 1}
+            }
+        )
+        if released:
+            return True
+
+    raise SeatContention(event_id)
+
+
+async def release_child_seats(event_id: str, child_ids: list[str]) -> list[str]:
+    """
+        Atomically give back the seats of whichever of these children are
+        still enrolled; returns the IDs released
+    """
+    for _ in range(RELEASE_ATTEMPTS):
+        event = await db.events.find_unique(where={"id": event_id})
+        if not event:
+            return []
+
+        enrolled = event.childIDs or []
+        to_remove = [cid for cid in child_ids if cid in enrolled]
+        if not to_remove:
+            return []
+
+        released = await db.events.update_many(
+            where={"id": event_id, "childIDs": {"equals": enrolled}},
+            data={
+                "childIDs": [cid for cid in enrolled if cid not in to_remove],
+                "participants": {"decrement": len(to_remove)},
+                "openSeats": {"increment": len(to_remove)}
+            }
+        )
+        if not released:
+            continue
+
+        # The other side of the relation, which update_many cannot disconnect
+        children = await db.children.find_many(where={"id": {"in": to_remove}})
+        for child in children:
+            await db.children.update(
+                where={"id": child.id},
+                data={"eventIDs": [eid for eid in (child.eventIDs or []) if eid != event_id]}
+            )
+        return to_remove
+
+    raise SeatContention(event_id)
+
+
+# =======================================================
+async def waitlist_position(event_id: str, entry) -> int:
+    return await db.eventwaitlist.count(
+        where={
+            "eventId": event_id,
+            "createdAt": {"lte": entry.createdAt}
+        }
+    )
+
+
+async def join_waitlist(event_id: str, user_id: str, child_ids: list[str] | None = None) -> int:
+    """
+        Queue a user (or their children) for an event that is full
+
+        Returns the 1-based position in the FIFO waitlist. Requests that are
+        already queued keep their original position.
+    """
+    child_ids = child_ids or []
+
+    existing_entries = await db.eventwaitlist.find_many(
+        where={"eventId": event_id, "userId": user_id}
+    )
+
+    if not child_ids:
+        for entry in existing_entries:
+            if not entry.childIDs:
+                return await waitlist_position(event_id, entry)
+    else:
+        queued = {cid for entry in existing_entries for cid in entry.childIDs}
+        child_ids = [cid for cid in child_ids if cid not in queued]
+        if not child_ids:
+            entry = next(entry for entry in existing_entries if entry.childIDs)
+            return await waitlist_position(event_id, entry)
+
+    entry = await db.eventwaitlist.create(
+        data={
+            "eventId": event_id,
+            "userId": user_id,
+            "childIDs": child_ids,
+            "seats": len(child_ids) or 1
+        }
+    )
+    return await waitlist_position(event_id, entry)
+
+
+async def leave_waitlist(event_id: str, user_id: str, child_ids: list[str] | None = None) -> int:
+    """
+        Drop a user's own waitlist entry, or the entries holding these children
+    """
+    if not child_ids:
+        return await db.eventwaitlist.delete_many(
+            where={"eventId": event_id, "userId": user_id, "childIDs": {"is_empty": True}}
+        )
+
+    return await db.eventwaitlist.delete_many(
+        where={"eventId": event_id, "userId": user_id, "childIDs": {"has_some": child_ids}}
+    )
+
+
+# =======================================================
+# A promoter holds the head of the queue by claiming it for this long; a
+# claim left behind by a crashed request simply expires
+WAITLIST_CLAIM_SECONDS = 30
+
+
+async def claim_waitlist_entry(entry, claim_id: str) -> bool:
+    now = datetime.now(timezone.utc)
+    claimed = await db.eventwaitlist.update_many(
+        where={"id": entry.id, "NOT": [{"claimedUntil": {"gt": now}}]},
+        data={"claimedBy": claim_id, "claimedUntil": now + timedelta(seconds=WAITLIST_CLAIM_SECONDS)}
+    )
+    return bool(claimed)
+
+
+async def release_waitlist_entry(entry, claim_id: str):
+    await db.eventwaitlist.update_many(
+        where={"id": entry.id, "claimedBy": claim_id},
+        data={"claimedBy": None, "claimedUntil": None}
+    )
+
+
+async def promote_waitlist(event_id: str) -> list:
+    """
+        Move waitlisted requests into freed seats, oldest first
+
+        The head entry is claimed with a conditional update and only deleted
+        once its seats are reserved, so it keeps its place (and join_waitlist
+        keeps seeing it) while being promoted. A head that is claimed by
+        another request, or does not fit yet, stops promotion, preserving
+        FIFO order. If a promotion fails or the process dies, the entry is
+        released or its claim expires and it is retried in place.
+    """
+    promoted = []
+    claim_id = uuid.uuid4().hex
+
+    while True:
+        entry = await db.eventwaitlist.find_first(
+            where={"eventId": event_id},
+            order=[{"createdAt": "asc"}, {"id": "asc"}],
+            include={"user": True}
+        )
+        if not entry or not await claim_waitlist_entry(entry, claim_id):
+            break
+
+        try:
+            if entry.childIDs:
+                reserved = await reserve_child_seats(event_id, entry.childIDs)
+            else:
+                reserved = await reserve_user_seat(event_id, entry.userId)
+
+            # Drop requests that were enrolled some other way in the meantime,
+            # or by a promoter that died before deleting the entry
+            already_enrolled = False
+            if not reserved:
+                event = await db.events.find_unique(where={"id": event_id})
+                if not event:
+                    break
+                if entry.childIDs:
+                    already_enrolled = bool(set(entry.childIDs) & set(event.childIDs or []))
+                else:
+                    already_enrolled = entry.userId in (event.userIDs or [])
+        except BaseException:
+            await release_waitlist_entry(entry, claim_id)
+            raise
+
+        if not reserved and not already_enrolled:
+            await release_waitlist_entry(entry, claim_id)
+            break
+
+        await db.eventwaitlist.delete_many(where={"id": entry.id, "claimedBy": claim_id})
+        if reserved:
+            promoted.append(entry)
+
+    return promoted
+
+
+async def notify_promoted(event, promoted: list, background_tasks: BackgroundTasks):
+    """
+        Confirm enrollment to everyone moved off the waitlist
+    """
+    for entry in promoted:
+        who = "your child has" if entry.childIDs else "you have"
+        context = WaitlistContext(event_name=event.name, event_date=convert_iso_date_to_string(event.date), who=who)
+        message = render("waitlist_promoted", context)
+
+        await enqueue_email(
+            entry.user.email,
+            *message,
+            key=email_key("waitlist-promoted", entry.id)
+        )
+
+        await create_notification(
+            data={
+                "title": message.subject,
+                "description": render_summary("waitlist_promoted", context),
+                "userId": entry.userId,
+                "isRead": False,
+                "time": event.date,
+            }
+        )
+
+        background_tasks.add_task(
+            schedule_reminder,
+            event.id,
+            event.date,
+            user_ids=[entry.userId]
+        )
@@ -1,20 +1,62 @@
-from fastapi import APIRouter, status, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, status, Depends, HTTPException, BackgroundTasks, Query, Request
 from backend.db.prisma_client import db
+from prisma.errors import UniqueViolationError
+from backend.db.pagination import paginate, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from backend.db.geo_index import event_geo_index, ensure_event_geo_index
+from backend.db.fieldsets import FieldSet
+from prisma.partials import EventCard
 from typing import Annotated
 from backend.models.user_models import User
 from backend.models.interaction_models import EventCreate, EventUpdate, ReviewCreate, EnrollChildren, NotificationCreate
-from .auth.login import get_current_user
-from .auth.utils import enforce_admin, enforce_authentication, convert_iso_date_to_string
+from .auth.login import get_current_user, get_current_principal, Principal
+from .auth.utils import enforce_admin, enforce_authentication
 from datetime import datetime, timezone
-from .notifications import send_email_one_user, schedule_reminder, send_email_multiple_users
+from .notifications import schedule_reminder
+from .outbox import enqueue_email, enqueue_bulk_email
+from .inbox import create_notification, create_notifications
+from .message_templates import render, render_summary, EventContext, AnnouncementContext
+from .response_cache import cached_json_response, bump_collection_version
+from .audience import resolve_event_audience, iter_user_batches
+from .review_stats import record_rating_change, move_event_ratings, forget_event_ratings
+from .validation import run_concurrently, require_record, require_ids
+from .enrollment import reserve_user_seat, reserve_child_seats, release_user_seat, release_child_seats, SeatContention, join_waitlist, leave_waitlist, promote_waitlist, notify_promoted
 router = APIRouter()
 
 
+# Selectable with ?fields= and ?include= on the event reads
+EVENT_SCALAR_FIELDS = {
+   "id", "name", "description", "date", "image", "participants", "limit", "openSeats",
+   "city", "state", "address", "zipCode", "latitude", "longitude", "startTime", "endTime",
+   "volunteerLimit", "createdAt", "updatedAt", "activityId", "userIDs", "childIDs", "volunteerIDs",
+   "reviewCount", "ratingSum", "rating1Count", "rating2Count", "rating3Count", "rating4Count",
+   "rating5Count", "averageRating"
+}
+# Users and children are never hydrated on these public, cached reads; their
+# IDs stay selectable through userIDs / childIDs
+EVENT_RELATIONS = {"reviews", "activity"}
+
+
+# The list is ordered and paged by date
+EVENT_LIST_FIELDS = FieldSet(
+   fields=EVENT_SCALAR_FIELDS,
+   relations=EVENT_RELATIONS,
+   required={"date"},
+   partials=(EventCard,)
+)
+
+
+EVENT_DETAIL_FIELDS = FieldSet(
+   fields=EVENT_SCALAR_FIELDS,
+   relations=EVENT_RELATIONS,
+   default_relations=EVENT_RELATIONS,
+   partials=(EventCard,)
+)
+
+
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def create_event(
    event_data: EventCreate,
-   current_user: Annotated[User, Depends(get_current_user)],
-   background_tasks: BackgroundTasks
+   current_user: Annotated[Principal, Depends(get_current_principal)]
 ):
    """
    Create Event
@@ -33,44 +75,15 @@ async def create_event(
    enforce_admin(current_user, "create an event")
 
 
-   # Verify that the activity ID is valid
-   activity = await db.activities.find_unique(where={
-       "id": event_data.activityId
-   })
-
-
-   if not activity:
-       raise HTTPException(
-           status_code=404,
-           detail="Activity not found."
-       )
-
-
-   # Verify that the userIDs and childIDs are valid
-   valid_users = await db.users.find_many(
-       where={"id": {"in": event_data.userIDs}}
+   # Verify the activity, userIDs and childIDs concurrently; the first
+   # invalid reference fails the request and cancels the other lookups
+   await run_concurrently(
+       require_record(db.activities, event_data.activityId, 404, "Activity not found."),
+       require_ids(db.users, event_data.userIDs, 400, "One or more user IDs are invalid."),
+       require_ids(db.children, event_data.childIDs, 400, "One or more child IDs are invalid.")
    )
 
 
-   if len(valid_users) != len(event_data.userIDs):
-       raise HTTPException(
-           status_code=400,
-           detail="One or more user IDs are invalid."
-       )
-
-
-   valid_children = await db.children.find_many(
-       where={"id": {"in": event_data.childIDs}}
-   )
-
-
-   if len(valid_children) != len(event_data.childIDs):
-       raise HTTPException(
-           status_code=400,
-           detail="One or more child IDs are invalid."
-       )
-
-
    # Create the event
    try:
        new_event = await db.events.create(
@@ -81,6 +94,7 @@ async def create_event(
                "image": event_data.image,
                "participants": event_data.participants,
                "limit": event_data.limit,
+               "openSeats": event_data.limit - event_data.participants,
                "city": event_data.city,
                "state": event_data.state,
                "address": event_data.address,
@@ -101,21 +115,21 @@ async def create_event(
        )
 
 
-       # Send the email notification to all users upon event creation
-       users = await db.users.find_many()
-       user_emails = [user.email for user in users]
+       event_geo_index.upsert(new_event.id, new_event.latitude, new_event.longitude)
+       bump_collection_version("events")
 
 
-       subject = f'Check Out Our New Event at Wonderhood: {new_event.name}'
-       contents = f'Hello,\n\n Check out our new event at Wonderhood. We hope to see you there.\n\nBest,\n\nWonderhood Team'
+       # Send the email notification to all users upon event creation,
+       # streamed in id-ordered batches; rendered once for the whole run
+       message = render("event_announced", EventContext.from_event(new_event))
 
 
-       background_tasks.add_task(
-           send_email_multiple_users,
-           user_emails,
-           subject,
-           contents
-       )
+       async for users in iter_user_batches():
+           await enqueue_bulk_email(
+               [user.email for user in users],
+               *message,
+               key_prefix=f"event-created:{new_event.id}"
+           )
 
 
    except Exception as e:
@@ -132,8 +146,19 @@ async def create_event(
 
 @router.get("", status_code=status.HTTP_200_OK)
 async def get_all_events(
-   # skip: int = 0,
-   # limit: int = 10,
+   request: Request,
+   cursor: str | None = None,
+   limit: int = DEFAULT_PAGE_SIZE,
+   date_from: datetime | None = None,
+   date_to: datetime | None = None,
+   city: str | None = None,
+   state: str | None = None,
+   zipCode: str | None = None,
+   activityId: str | None = None,
+   has_open_seats: bool = False,
+   upcoming: bool = True,
+   fields: str | None = None,
+   include: str | None = None,
 ):
 
 
@@ -141,20 +166,64 @@ async def get_all_events(
    Get All Events
 
 
-   Returns every event in the system
-   Applies pagination
+   Returns events soonest-first, filtered server-side:
+   - **date_from** / **date_to**: date window (upcoming=true starts it at now)
+   - **city** / **state** / **zipCode**: location
+   - **activityId**: only events for this activity
+   - **has_open_seats**: only events with participants below their limit
+   - **fields** / **include**: comma-separated fields and relations to return
+   Applies cursor pagination: pass next_cursor back as ?cursor= for the next page
    """
 
 
-   try:
-       events = await db.events.find_many(
-           # skip=skip,
-           # take=limit,
-           order={"createdAt": "desc"}
+   selection = EVENT_LIST_FIELDS.select(fields, include)
+
+
+   filters = {}
+
+
+   date_filter = {}
+   if date_from is not None:
+       date_filter["gte"] = date_from
+   elif upcoming:
+       date_filter["gte"] = datetime.now(timezone.utc)
+   if date_to is not None:
+       date_filter["lte"] = date_to
+   if date_filter:
+       filters["date"] = date_filter
+
+
+   if city is not None:
+       filters["city"] = city
+   if state is not None:
+       filters["state"] = state
+   if zipCode is not None:
+       filters["zipCode"] = zipCode
+   if activityId is not None:
+       filters["activityId"] = activityId
+   if has_open_seats:
+       filters["openSeats"] = {"gt": 0}
+
+
+   async def load_events():
+       events, next_cursor = await paginate(
+           selection.client(db.events, db),
+           cursor=cursor,
+           limit=limit,
+           where=filters,
+           include=selection.include,
+           sort_field="date",
+           direction="asc"
        )
-       return {"events": events}
+       return {"events": [selection.project(event) for event in events], "next_cursor": next_cursor}
+
+
+   try:
+       return await cached_json_response(request, "get_all_events", ("events",), load_events)
 
 
+   except HTTPException:
+       raise
    except Exception as e:
        raise HTTPException(
            status_code=500,
@@ -164,8 +233,66 @@ async def get_all_events(
 
 
 
+@router.get("/near", status_code=status.HTTP_200_OK)
+async def get_events_near(
+   latitude: float = Query(ge=-90, le=90),
+   longitude: float = Query(ge=-180, le=180),
+   radius_km: float = Query(default=25, gt=0, le=500),
+   limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+   upcoming: bool = True,
+):
+
+
+   """
+   Get Events Near a Location
+
+
+   Returns up to `limit` events within `radius_km` of the given point,
+   nearest first, each with its distance in kilometres
+   """
+
+
+   try:
+       geo_index = await ensure_event_geo_index(db)
+       matches = geo_index.within_radius(latitude, longitude, radius_km)
+       if not matches:
+           return {"events": []}
+
+
+       distances = dict(matches)
+       filters = {"id": {"in": list(distances)}}
+       if upcoming:
+           filters["date"] = {"gte": datetime.now(timezone.utc)}
+
+
+       events = await db.events.find_many(where=filters)
+       events.sort(key=lambda event: distances[event.id])
+
+
+       return {
+           "events": [
+               {"event": event, "distanceKm": round(distances[event.id], 3)}
+               for event in events[:limit]
+           ]
+       }
+
+
+   except Exception as e:
+       raise HTTPException(
+           status_code=500,
+           detail=f"Failed to fetch nearby events: {str(e)}"
+       )
+
+
+
+
 @router.get("/{event_id}", status_code=status.HTTP_200_OK)
-async def get_event_by_id(event_id: str):
+async def get_event_by_id(
+   event_id: str,
+   request: Request,
+   fields: str | None = None,
+   include: str | None = None
+):
 
 
    """
@@ -173,20 +300,20 @@ async def get_event_by_id(event_id: str):
 
 
    Fetches an event by its ID
-   Hydrates the event with its user/children/activity data
+   Hydrates the event with its reviews and activity unless ?include=
+   names a subset; ?fields= trims the event's own fields
+   Served with a strong ETag; a matching If-None-Match returns 304
    """
 
 
-   try:
+   selection = EVENT_DETAIL_FIELDS.select(fields, include)
+
+
+   async def load_event():
        # Fetch the event
-       event = await db.events.find_unique(
+       event = await selection.client(db.events, db).find_unique(
            where={"id": event_id},
-           include={
-               "reviews": True,
-               "users": True,
-               "activity": True,
-               "children": True
-           }
+           include=selection.include
        )
 
 
@@ -197,9 +324,20 @@ async def get_event_by_id(event_id: str):
            )
 
 
-       return event
+       return selection.project(event)
+
 
+   try:
+       return await cached_json_response(
+           request,
+           "get_event_by_id",
+           ("events", "reviews", "activities"),
+           load_event
+       )
 
+
+   except HTTPException:
+       raise
    except Exception as e:
        raise HTTPException(
            status_code=500,
@@ -213,7 +351,7 @@ async def get_event_by_id(event_id: str):
 async def update_event(
    event_id: str,
    event_data: EventUpdate,
-   current_user: Annotated[User, Depends(get_current_user)],
+   current_user: Annotated[Principal, Depends(get_current_principal)],
    background_tasks: BackgroundTasks
 ):
 
@@ -238,43 +376,13 @@ async def update_event(
    enforce_admin(current_user, "update an event")
 
 
-   # Find the event
-   event = await db.events.find_unique(where={"id": event_id})
-
-
-   if not event:
-       raise HTTPException(
-           status_code=status.HTTP_404_NOT_FOUND,
-           detail="Event not found"
-       )
-
-
-   # Validate user, child, and activity IDs
-   if event_data.userIDs:
-       users = await db.users.find_many(where={"id": {"in": event_data.userIDs}})
-       if len(users) != len(event_data.userIDs):
-           raise HTTPException(
-               status_code=status.HTTP_400_BAD_REQUEST,
-               detail="One or more user IDs are invalid"
-           )
-
-
-   if event_data.childIDs:
-       children = await db.children.find_many(where={"id": {"in": event_data.childIDs}})
-       if len(children) != len(event_data.childIDs):
-           raise HTTPException(
-               status_code=status.HTTP_400_BAD_REQUEST,
-               detail="One or more child IDs is invalid"
-           )
-
-
-   if event_data.activityId:
-       activity = await db.activities.find_unique(where={"id": event_data.activityId})
-       if not activity:
-           raise HTTPException(
-               status_code=status.HTTP_400_BAD_REQUEST,
-               detail="Activity ID is invalid"
-           )
+   # Find the event and validate user, child, and activity IDs concurrently
+   event, *_ = await run_concurrently(
+       require_record(db.events, event_id, status.HTTP_404_NOT_FOUND, "Event not found"),
+       require_ids(db.users, event_data.userIDs, status.HTTP_400_BAD_REQUEST, "One or more user IDs are invalid"),
+       require_ids(db.children, event_data.childIDs, status.HTTP_400_BAD_REQUEST, "One or more child IDs is invalid"),
+       require_ids(db.activities, [event_data.activityId] if event_data.activityId else None, status.HTTP_400_BAD_REQUEST, "Activity ID is invalid")
+   )
 
 
    # Prepare the update data and update the event
@@ -353,6 +461,38 @@ async def update_event(
        update_payload["childIDs"] = event_data.childIDs
 
 
+   # Apply limit/participants changes as deltas on openSeats, conditioned on
+   # the values they were computed from, so reserves and leaves that land
+   # in between are kept rather than overwritten
+   seat_change = 0
+   seat_where = {"id": event_id}
+   seat_data = {}
+
+
+   new_limit = update_payload.pop("limit", event.limit)
+   if new_limit != event.limit:
+       seat_where["limit"] = event.limit
+       seat_data["limit"] = new_limit
+       seat_change += new_limit - event.limit
+
+
+   new_participants = update_payload.pop("participants", event.participants)
+   if new_participants != event.participants:
+       seat_where["participants"] = event.participants
+       seat_data["participants"] = {"increment": new_participants - event.participants}
+       seat_change -= new_participants - event.participants
+
+
+   if seat_data:
+       seat_data["openSeats"] = {"increment": seat_change}
+       changed = await db.events.update_many(where=seat_where, data=seat_data)
+       if not changed:
+           raise HTTPException(
+               status_code=status.HTTP_409_CONFLICT,
+               detail="The event's seats changed while updating, please try again"
+           )
+
+
    update_payload["updatedAt"] = datetime.utcnow()
 
 
@@ -363,38 +503,41 @@ async def update_event(
        where={"id": event_id},
        data=update_payload
    )
+   event_geo_index.upsert(updated_event.id, updated_event.latitude, updated_event.longitude)
 
 
-   # Send email notification for event date update
-   user_IDs =  event.userIDs
-   users = await db.users.find_many(
-       where={"id": {"in": user_IDs}}
-   )
+   # Move the event's ratings to its new activity
+   if "activityId" in update_payload:
+       await move_event_ratings(event, update_payload["activityId"])
+       bump_collection_version("activities")
+
+
+   # A raised limit opens seats for the waitlist
+   if seat_change > 0:
+       promoted = await promote_waitlist(event_id)
+       if promoted:
+           await notify_promoted(updated_event, promoted, background_tasks)
+           updated_event = await db.events.find_unique(where={"id": event_id})
+   bump_collection_version("events")
+
+
+   # Move the event's reminder along with its date
+   if "date" in update_payload:
+       await schedule_reminder(event_id, updated_event.date, reschedule=True)
 
 
-   user_emails = [user.email for user in users]
+   # Send email notification for event date update to enrolled users and parents
+   recipients = await resolve_event_audience(event, users=True, parents=True)
+   user_emails = [recipient.email for recipient in recipients]
 
 
    # ? Add link to contents for having a user make changes to their event enrollment.
-   if update_payload.get("name") and update_payload.get("date"):
-       subject = f'Wonderhood: {update_payload["name"]} Update'
-       contents = f'Hello,\n\nThe {update_payload["name"]} has been rescheduled to {update_payload["date"]}. We hope to see you there!\n\n Best,\n\n Wonderhood Team'
-   elif update_payload.get("date") and not update_payload.get("name"):
-       subject = f'Wonderhood: {event.name} Update'
-       contents = f'Hello,\n\nThe {event.name} has been rescheduled to {update_payload["date"]}. We hope to see you there!\n\n Best,\n\n Wonderhood Team'
-   elif update_payload.get("name") and not update_payload.get("date"):
-       subject = f'Wonderhood: {update_payload["name"]} Update'
-       contents = f'Hello,\n\nThe {update_payload["name"]} has been rescheduled to {convert_iso_date_to_string(event.date)}. We hope to see you there!\n\n Best,\n\n Wonderhood Team'
-   else:
-       subject = f'Wonderhood: {event.name} Update'
-       contents = f'Hello,\n\nThe {event.name} has been rescheduled to {convert_iso_date_to_string(event.date)}. We hope to see you there!\n\n Best,\n\n Wonderhood Team'
+   message = render("event_updated", EventContext.from_event(updated_event))
 
 
-   background_tasks.add_task(
-       send_email_multiple_users,
+   await enqueue_bulk_email(
        user_emails,
-       subject,
-       contents
+       *message
    )
 
 
@@ -406,8 +549,7 @@ async def update_event(
 @router.delete("/{event_id}", status_code=status.HTTP_200_OK)
 async def delete_event_by_id(
    event_id: str,
-   current_user: Annotated[User, Depends(get_current_user)],
-   background_tasks: BackgroundTasks
+   current_user: Annotated[Principal, Depends(get_current_principal)]
 ):
 
 
@@ -431,10 +573,7 @@ async def delete_event_by_id(
 
 
    # Verify that the event exists
-   event = await db.events.find_unique(
-       where={"id": event_id},
-       include={"users": True}
-       )
+   event = await db.events.find_unique(where={"id": event_id})
    if not event:
        raise HTTPException(
            status_code=status.HTTP_404_NOT_FOUND,
@@ -442,26 +581,27 @@ async def delete_event_by_id(
        )
 
 
-   # Get all the emails associated with an event as list
-   users =  event.users
-   user_emails = [user.email for user in users]
+   # Get all the emails associated with an event (enrolled users and parents) as list
+   recipients = await resolve_event_audience(event, users=True, parents=True)
+   user_emails = [recipient.email for recipient in recipients]
 
 
    # Send the email notification to users
-   subject = f'Wonderhood: {event.name} Cancellation'
-   contents = f'Hello,\n\nWe regret to inform you that the {event.name} event on {convert_iso_date_to_string(event.date)} has been cancelled. Please take a look at our website for upcoming events.\n\n Best,\n\n Wonderhood Team'
+   message = render("event_cancelled", EventContext.from_event(event))
 
 
-   background_tasks.add_task(
-       send_email_multiple_users,
+   await enqueue_bulk_email(
        user_emails,
-       subject,
-       contents
+       *message,
+       key_prefix=f"event-cancelled:{event_id}"
    )
 
 
    # Delete the event
    await db.events.delete(where={"id": event_id})
+   event_geo_index.remove(event_id)
+   await forget_event_ratings(event)
+   bump_collection_version("events", "activities")
 
 
    return {"message": "Event deleted successfully"}
@@ -483,7 +623,7 @@ async def add_user_to_event(
    Verify authentication
    Fetch the event
    Check if user is already enrolled
-   If not, add user to event
+   If not, atomically take a seat, or join the waitlist when the event is full
    Return success message
    """
 
@@ -510,34 +650,47 @@ async def add_user_to_event(
        )
 
 
-   # Add the user to the event
-   updated_event = await db.events.update(
-       where={"id": event_id},
-       data={
-           "users": {"connect": {"id": current_user.id}},
-           "participants": {"increment": 1}
-           }
-       )
+   # Add the user to the event; only succeeds while a seat is open
+   reserved = await reserve_user_seat(event_id, current_user.id)
+   updated_event = await db.events.find_unique(where={"id": event_id})
+
+
+   if not reserved:
+       if current_user.id in (updated_event.userIDs or []):
+           raise HTTPException(
+               status_code=400,
+               detail="User is already enrolled"
+           )
+
+
+       position = await join_waitlist(event_id, current_user.id)
+       return {
+           "event": updated_event,
+           "waitlisted": True,
+           "position": position,
+           "message": f"Event is full. User added to the waitlist at position {position}"
+       }
+
+
+   bump_collection_version("events")
 
 
    # Create notification
-   subject = f"Enrollment Confirmation: {event.name}"
    # ? ADD link to make changes still
-   contents = f'This email confirms that you are enrolled for the {event.name} event on {convert_iso_date_to_string(event.date)}. If you are no longer available to join the event, please make changes here: .\n\nBest,\n\nWondherhood Team'
+   context = EventContext.from_event(event)
+   message = render("user_enrolled", context)
 
 
-   background_tasks.add_task(
-       send_email_one_user,
+   await enqueue_email(
        current_user.email,
-       subject,
-       contents
+       *message
    )
 
 
-   await db.notifications.create(
+   await create_notification(
        data={
-           "title": subject,
-           "description": f"Confirmation for event {event.name}",
+           "title": message.subject,
+           "description": render_summary("user_enrolled", context),
            "userId": current_user.id,
            "isRead": False,
            "time": event.date,
@@ -548,9 +701,9 @@ async def add_user_to_event(
    # Schedule the one-day reminder
    background_tasks.add_task(
        schedule_reminder,
-       current_user.id,
        event_id,
-       event.date
+       event.date,
+       user_ids=[current_user.id]
    )
 
 
@@ -622,33 +775,47 @@ async def add_children_to_event(
            )
 
 
-   # Add children to event
-   updated_event = await db.events.update(
-       where={"id": event_id},
-          data={
-           "children": {"connect": [{"id": cid} for cid in to_add]},
-           "participants": {"increment": len(to_add)}
+   # Add children to event; all of them get a seat or none do
+   reserved = await reserve_child_seats(event_id, to_add)
+   updated_event = await db.events.find_unique(where={"id": event_id})
+
+
+   if not reserved:
+       to_add = [cid for cid in to_add if cid not in (updated_event.childIDs or [])]
+       if not to_add:
+           return {
+               "event": updated_event,
+               "message": "No new children to enroll"
            }
-   )
+
+
+       position = await join_waitlist(event_id, current_user.id, to_add)
+       return {
+           "event": updated_event,
+           "waitlisted": True,
+           "position": position,
+           "message": f"Event is full. Children added to the waitlist at position {position}"
+       }
+
+
+   bump_collection_version("events")
 
 
    # Create notification
-   subject = f'Enrollment Confirmation: {event.name}'
-   content = f'Hello,\n\nThis email confirms that your child has been enrolled for the {event.name} event at Wonderhood for {convert_iso_date_to_string(event.date)}.\n\nWe look forward to see you there!\n\nBest,\n\nWonderhood Team'
+   context = EventContext.from_event(event)
+   message = render("child_enrolled", context)
 
 
-   background_tasks.add_task(
-       send_email_one_user,
+   await enqueue_email(
        current_user.email,
-       subject,
-       content
+       *message
    )
 
 
-   await db.notifications.create(
+   await create_notification(
        data= {
-           "title": subject,
-           "description": f"Confirmation for event {event.name}",
+           "title": message.subject,
+           "description": render_summary("child_enrolled", context),
            "userId": current_user.id,
            "isRead": False,
            "time": event.date,
@@ -660,9 +827,9 @@ async def add_children_to_event(
    # Schedule the one-day reminder
    background_tasks.add_task(
        schedule_reminder,
-       current_user.id,
        event_id,
-       event.date
+       event.date,
+       user_ids=sorted({pid for c in children if c.id in to_add for pid in (c.parentIDs or [])})
    )
 
 
@@ -683,8 +850,9 @@ async def remove_user_from_event(
 
    Verify authentication
    Fetch the event
-   Check that user is enrolled
+   Check that user is enrolled (or drop them from the waitlist)
    Remove the user from the event
+   Promote the waitlist into the freed seat
    Return success message
    """
 
@@ -709,6 +877,28 @@ async def remove_user_from_event(
 
    # Check if user is enrolled
    if current_user.id not in event.userIDs:
+       if await leave_waitlist(event_id, current_user.id):
+           return {"event": event, "message": "User removed from the waitlist"}
+
+
+       raise HTTPException(
+           status_code=400,
+           detail="User is not enrolled"
+       )
+
+
+   # Remove the user from the event; only the leave that actually takes
+   # the user off the list gives the seat back
+   try:
+       released = await release_user_seat(event_id, current_user.id)
+   except SeatContention:
+       raise HTTPException(
+           status_code=status.HTTP_409_CONFLICT,
+           detail="The event is busy, please try again"
+       )
+
+
+   if not released:
        raise HTTPException(
            status_code=400,
            detail="User is not enrolled"
@@ -719,29 +909,21 @@ async def remove_user_from_event(
 
 
    # Send notification to User that they have been removed from event
-   subject = f'Unenrollment Confirmation: {event.name}'
-   content = f'Hello,\n\nThis email confirms that you have been unenrolled from the {event.name} event at Wonderhood on {convert_iso_date_to_string(event.date)}. Please find more events at our website.\n\nBest,\n\nWonderhood Team'
+   message = render("user_unenrolled", EventContext.from_event(event))
 
 
-   background_tasks.add_task(
-       send_email_one_user,
+   await enqueue_email(
        current_user.email,
-       subject,
-       content
+       *message
    )
 
 
-   # Remove the user from the event
-   updated_user_list = [uid for uid in event.userIDs if uid != current_user.id]
-
-
-   updated_event = await db.events.update(
-       where={"id": event_id},
-         data={
-           "userIDs": updated_user_list,
-           "participants": {"decrement":1}
-           }
-   )
+   # Hand the freed seat to the waitlist
+   promoted = await promote_waitlist(event_id)
+   if promoted:
+       await notify_promoted(event, promoted, background_tasks)
+   updated_event = await db.events.find_unique(where={"id": event_id})
+   bump_collection_version("events")
 
 
    return {"event": updated_event, "message": "User removed from event"}
@@ -768,8 +950,9 @@ async def remove_child_from_event(
    Validate authentication
    Fetch the event
    Verify that current user is a parent of the child
-   Confirm that the child is enrolled
+   Confirm that the child is enrolled (or drop them from the waitlist)
    Remove child from event
+   Promote the waitlist into the freed seats
    Return success message
    """
 
@@ -799,6 +982,13 @@ async def remove_child_from_event(
 
    to_remove = list(selected_ids & existing_ids)
    if not to_remove:
+       if await leave_waitlist(event_id, current_user.id, list(selected_ids)):
+           return {
+               "event": event,
+               "message": "Selected children removed from the waitlist"
+           }
+
+
        return {
            "event": event,
            "message": "Selected children are not enrolled"
@@ -824,30 +1014,39 @@ async def remove_child_from_event(
            )
 
 
-   # Remove child from event
-   updated_child_list = [cid for cid in (event.childIDs or []) if cid not in to_remove]
+   # Remove children from the event; seats are only given back for the
+   # children this request actually took off the list
+   try:
+       to_remove = await release_child_seats(event_id, to_remove)
+   except SeatContention:
+       raise HTTPException(
+           status_code=status.HTTP_409_CONFLICT,
+           detail="The event is busy, please try again"
+       )
 
 
-   updated_event = await db.events.update(
-       where={"id": event_id},
-        data={
-           "children": {"disconnect": [{"id": cid} for cid in to_remove]},
-           "childIDs": updated_child_list,
-           "participants": {"decrement": len(to_remove)}
-           }
-   )
+   if not to_remove:
+       raise HTTPException(
+           status_code=404,
+           detail="Selected children are no longer enrolled"
+       )
+
+
+   # Hand the freed seats to the waitlist
+   promoted = await promote_waitlist(event_id)
+   if promoted:
+       await notify_promoted(event, promoted, background_tasks)
+   updated_event = await db.events.find_unique(where={"id": event_id})
+   bump_collection_version("events")
 
 
    # Notification to user for unenrolling child
-   subject = f'Unenrollment Confirmation: {event.name}'
-   content = f'Hello,\n\nThis email confirms that your child has been unenrolled from the {event.name} on {convert_iso_date_to_string(event.date)}. Please find more events on our website.\n\nBest,\n\nWonderhood Team'
+   message = render("child_unenrolled", EventContext.from_event(event))
 
 
-   background_tasks.add_task(
-       send_email_one_user,
+   await enqueue_email(
        current_user.email,
-       subject,
-       content
+       *message
    )
 
 
@@ -867,7 +1066,7 @@ async def remove_child_from_event(
 @router.get("/{event_id}/reviews", status_code=status.HTTP_200_OK)
 async def get_all_reviews_by_event(
    event_id: str,
-   skip: int = 0,
+   cursor: str | None = None,
    limit: int = 10
 ):
 
@@ -878,11 +1077,11 @@ async def get_all_reviews_by_event(
 
 
    try:
-       reviews = await db.reviews.find_many(
-           where={ "eventId": event_id},
-            # TODO Ensure pagination is working
-               skip=skip,
-               take=limit
+       reviews, next_cursor = await paginate(
+           db.reviews,
+           cursor=cursor,
+           limit=limit,
+           where={"eventId": event_id}
        )
 
 
@@ -893,9 +1092,11 @@ async def get_all_reviews_by_event(
            )
 
 
-       return {"reviews": reviews}
+       return {"reviews": reviews, "next_cursor": next_cursor}
 
 
+   except HTTPException:
+       raise
    except Exception as e:
        raise HTTPException(
            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -973,38 +1174,24 @@ async def create_review(
 
 
 
-   # ! Do we need to add logic for preventing one user making many reviews?
-    existing_review = await db.reviews.find_first(
-        where={
-            "eventId": event_id,
-            "parentId": current_user.id
-           }
-    )
-
-
-    if existing_review:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User cannot make more than one review for an event."
-        )
-
-
+    # One review per parent per event is enforced by the Reviews
+    # @@unique([eventId, parentId]) index, so concurrent submissions
+    # cannot both get in and posting stays a single write
     try:
          review = await db.reviews.create(
               data={
-                   "eventId": review_data.eventId,
+                   "eventId": event_id,
                    "parentId": current_user.id,
                    "rating": review_data.rating,
                    "description": review_data.description,
                    "createdAt": datetime.utcnow()
               }
          )
-         return {
-           "review": review,
-           "message": "Review successfully made"
-           }
-
-
+    except UniqueViolationError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User cannot make more than one review for an event."
+        )
     except Exception as e:
          raise HTTPException(
               status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1012,17 +1199,24 @@ async def create_review(
          )
 
 
+    await record_rating_change(review.eventId, added=review.rating)
+    bump_collection_version("reviews", "events", "activities")
+    return {
+       "review": review,
+       "message": "Review successfully made"
+       }
+
+
 ########### * Notification endpoint(s) ###############
 # Have admin send a message to the users of children of an event
 @router.post("/{event_id}/notification/enrolled_users_child", status_code=status.HTTP_200_OK)
 async def send_message_to_users_of_enrolled_child(
-   current_user: Annotated[User, Depends(get_current_user)],
+   current_user: Annotated[Principal, Depends(get_current_principal)],
    event_id:str,
    notification: NotificationCreate,
    # title: str,
    # description: str,
    # icon: str,
-   background_tasks: BackgroundTasks
 ):
    """
        Send a message to users of enrolled children
@@ -1037,39 +1231,24 @@ async def send_message_to_users_of_enrolled_child(
    enforce_admin(current_user, "send notification")
 
 
-   # Query for the parents of children
-   event = await db.events.find_unique(
-       where={"id": event_id},
-       include={"children": {
-                    "include":{
-                       "parents": True
-                       }
-                    }
-                }
-   )
+   # Query for the event
+   event = await db.events.find_unique(where={"id": event_id})
 
 
    if not event:
        raise HTTPException(status_code=404, detail="Unable to obtain event")
 
 
-   # Add the parent IDs to a set
-   parent_ids = set()
-   for child in event.children:
-       parent_ids.update(child.parentIDs)
+   # Resolve the parents of enrolled children in bulk
+   parents = await resolve_event_audience(event, users=False, parents=True)
+   parent_ids = [parent.id for parent in parents]
 
 
    if not parent_ids:
        raise HTTPException(status_code=404, detail="Unable to obtain parent IDs")
 
 
-   # Query for the parents' email(s)
-   parent_emails = list()
-   for id in parent_ids:
-       users = await db.users.find_unique(
-           where={"id": id}
-       )
-       parent_emails.append(users.email)
+   parent_emails = [parent.email for parent in parents]
 
 
    if not parent_emails:
@@ -1090,17 +1269,15 @@ async def send_message_to_users_of_enrolled_child(
    ]
 
 
-   new_notification = await db.notifications.create_many(
+   new_notification = await create_notifications(
        data=notification_data
    )
 
 
    # Send the email
-   background_tasks.add_task(
-       send_email_multiple_users,
+   await enqueue_bulk_email(
        parent_emails,
-       notification.title,
-       notification.description
+       *render("announcement", AnnouncementContext(title=notification.title, description=notification.description))
    )
 
 
@@ -1119,8 +1296,7 @@ async def send_enrolled_user_notification(
    subject: str,
    content: str,
    # icon: str,
-   current_user: Annotated[User, Depends(get_current_user)],
-   background_tasks: BackgroundTasks
+   current_user: Annotated[Principal, Depends(get_current_principal)]
 ):
    """
        Send notifications to all users enrolled in an event
@@ -1141,39 +1317,36 @@ async def send_enrolled_user_notification(
        raise HTTPException(status_code=404, detail="Unable to locate event")
 
 
+   # Resolve enrolled users in bulk
+   recipients = await resolve_event_audience(event, users=True)
+
+
    # Create notification instance
    notification_data = [
        {
        "title": subject,
        "description": content,
-       "userId": id,
+       "userId": recipient.id,
        "isRead": False,
        "time": event.date,
        # "icon": icon
        }
-       for id in event.userIDs
+       for recipient in recipients
    ]
 
 
-   notification = await db.notifications.create_many(
+   notification = await create_notifications(
        data=notification_data
    )
 
 
    # create email notification
-   users_emails = list()
-   for id in event.userIDs:
-       users = await db.users.find_unique(
-           where={"id":id}
-       )
-       users_emails.append(users.email)
+   users_emails = [recipient.email for recipient in recipients]
 
 
-   background_tasks.add_task(
-       send_email_multiple_users,
+   await enqueue_bulk_email(
        users_emails,
-       subject,
-       content
+       *render("announcement", AnnouncementContext(title=subject, description=content))
    )
 
 
@@ -1188,8 +1361,7 @@ async def send_enrolled_user_notification(
 @router.patch("/{event_id}/volunteer_signup", status_code=status.HTTP_200_OK)
 async def volunteer_signup_for_event(
    current_user: Annotated[User, Depends(get_current_user)],
-   event_id: str,
-   background_tasks: BackgroundTasks
+   event_id: str
 ):
    """
    For specific event, volunteer is added to event when enrolled and volunteerLimit counter decrements
@@ -1229,33 +1401,32 @@ async def volunteer_signup_for_event(
                    "volunteerLimit": {"decrement": 1}
                }
            )
+       bump_collection_version("events")
 
-       title = f"Volunteer Enrollment Confirmation: {event.name}"
        # ? ADD link to make changes still
-       description = f'This email confirms that you are enrolled as a volunteer for the {event.name} event on {convert_iso_date_to_string(event.date)}. If you are no longer available to join the event, please make changes here: .\n\nBest,\n\nWondherhood Team'
-
-
+       message = render("volunteer_enrolled", EventContext.from_event(event))
 
 
        notification_data =  {
-               "title": title,
-               "description": description,
+               "title": message.subject,
+               "description": message.text,
                "userId": current_user.id,
                "isRead": False,
                "time": datetime.now(timezone.utc)
            }
 
-       new_notification = await db.notifications.create(
+       new_notification = await create_notification(
                data=notification_data
            )
 
 
-       background_tasks.add_task(
-               send_email_one_user,
-               volunteer.email,
-               title,
-               description
-           )
+       # Volunteers.email is optional; fall back to the volunteer's account
+       volunteer_email = volunteer.email or current_user.email
+       if volunteer_email:
+           await enqueue_email(
+                   volunteer_email,
+                   *message
+               )
 
 
 
@@ -1274,8 +1445,7 @@ async def volunteer_signup_for_event(
 @router.patch("/{event_id}/unenroll_volunteer", status_code=status.HTTP_200_OK)
 async def unenroll_volunteer_from_event(
    current_user: Annotated[User, Depends(get_current_user)],
-   event_id: str,
-   background_tasks: BackgroundTasks
+   event_id: str
 ):
    """
        Authenticate the user
@@ -1318,33 +1488,32 @@ async def unenroll_volunteer_from_event(
                    "volunteerLimit": {"increment": 1}
                }
            )
+       bump_collection_version("events")
 
-       title = f"Volunteer Unenrollment Confirmation: {event.name}"
        # ? ADD link to make changes still
-       description = f'This email confirms that you are unenrolled as a volunteer for the {event.name} event on {convert_iso_date_to_string(event.date)}.\n\nBest,\n\nWondherhood Team'
-
-
+       message = render("volunteer_unenrolled", EventContext.from_event(event))
 
 
        notification_data =  {
-               "title": title,
-               "description": description,
+               "title": message.subject,
+               "description": message.text,
                "userId": current_user.id,
                "isRead": False,
                "time": datetime.now(timezone.utc)
            }
 
-       new_notification = await db.notifications.create(
+       new_notification = await create_notification(
                data=notification_data
            )
 
 
-       background_tasks.add_task(
-               send_email_one_user,
-               volunteer.email,
-               title,
-               description
-           )
+       # Volunteers.email is optional; fall back to the volunteer's account
+       volunteer_email = volunteer.email or current_user.email
+       if volunteer_email:
+           await enqueue_email(
+                   volunteer_email,
+                   *message
+               )
 
        return {
            "Event": volunteer_unenroll_event,
@@ -0,0 +1,261 @@
+from backend.db.prisma_client import db
+from backend.db.pagination import clamp_page_size, encode_cursor, keyset_where, DEFAULT_PAGE_SIZE
+from prisma.errors import UniqueViolationError
+from prisma.partials import UserInbox, BroadcastStamp
+from collections import Counter
+from bisect import bisect_left, insort
+from dotenv import load_dotenv
+import asyncio
+import os
+import time
+
+load_dotenv()
+BROADCAST_CACHE_TTL_SECONDS = float(os.getenv("BROADCAST_CACHE_TTL_SECONDS", "30"))
+
+
+# Users.unreadNotifications (personal notifications) and Users.readBroadcasts
+# (broadcast receipts) are kept in step with every write that creates or reads
+# notifications, so the notification bell never counts per-user documents.
+# Create and mark notifications read through these helpers, not db.notifications.
+
+async def increment_unread(counts: dict[str, int], field: str = "unreadNotifications"):
+    """
+        Add to a per-user counter; users with the same delta share one update_many
+    """
+    by_delta = {}
+    for user_id, delta in counts.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(user_id)
+
+    for delta, user_ids in by_delta.items():
+        await db.users.update_many(
+            where={"id": {"in": user_ids}},
+            data={field: {"increment": delta}}
+        )
+
+
+async def decrement_unread(user_id: str, count: int):
+    """
+        Subtract from a user's unread counter without going below zero
+    """
+    if not count:
+        return
+
+    updated = await db.users.update_many(
+        where={"id": user_id, "unreadNotifications": {"gte": count}},
+        data={"unreadNotifications": {"decrement": count}}
+    )
+    if not updated:
+        await db.users.update(
+            where={"id": user_id},
+            data={"unreadNotifications": 0}
+        )
+
+
+# =======================================================
+async def create_notification(data: dict):
+    notification = await db.notifications.create(data=data)
+    if not notification.isRead:
+        await increment_unread({notification.userId: 1})
+    return notification
+
+
+async def create_notifications(data: list[dict]) -> int:
+    created = await db.notifications.create_many(data=data)
+    await increment_unread(Counter(row["userId"] for row in data if not row.get("isRead", False)))
+    return created
+
+
+class BroadcastTimeline:
+    """
+        Sorted creation times of every broadcast, cached per process
+
+        Counting the broadcasts a user can see is a bisect instead of a
+        query. Broadcasts created here are added as they are sent; the TTL
+        bounds how long a process misses ones sent by another process.
+    """
+
+    def __init__(self, ttl_seconds: float = BROADCAST_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._times = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _stale(self) -> bool:
+        return self._times is None or self._expires_at <= time.monotonic()
+
+    async def times(self) -> list:
+        if self._stale():
+            async with self._lock:
+                if self._stale():
+                    broadcasts = await BroadcastStamp.prisma(db).find_many(order={"createdAt": "asc"})
+                    self._times = [broadcast.createdAt for broadcast in broadcasts]
+                    self._expires_at = time.monotonic() + self.ttl_seconds
+        return self._times
+
+    def add(self, created_at):
+        if self._times is not None:
+            insort(self._times, created_at)
+
+    async def count_since(self, moment) -> int:
+        times = await self.times()
+        return len(times) - bisect_left(times, moment)
+
+
+broadcast_timeline = BroadcastTimeline()
+
+
+async def create_broadcast(data: dict):
+    """
+        One document for an announcement to every user, instead of a copy each
+    """
+    broadcast = await db.broadcastnotifications.create(data=data)
+    broadcast_timeline.add(broadcast.createdAt)
+    return broadcast
+
+
+# =======================================================
+async def load_inbox_user(user_id: str):
+    return await UserInbox.prisma(db).find_unique(where={"id": user_id})
+
+
+def visible_broadcasts(user) -> dict:
+    """
+        Users see the broadcasts sent after they signed up, as they did when
+        blasts were copied to every existing user
+    """
+    return {"createdAt": {"gte": user.createdAt}}
+
+
+def unread_broadcasts(user) -> dict:
+    return {**visible_broadcasts(user), "receipts": {"none": {"userId": user.id}}}
+
+
+async def unread_count(user_id: str) -> int:
+    user = await load_inbox_user(user_id)
+    if not user:
+        return 0
+
+    broadcasts = await broadcast_timeline.count_since(user.createdAt)
+    return (user.unreadNotifications or 0) + max(broadcasts - (user.readBroadcasts or 0), 0)
+
+
+async def inbox_page(
+        user_id: str,
+        cursor: str | None = None,
+        limit: int | None = DEFAULT_PAGE_SIZE,
+        unread_only: bool = False
+) -> tuple[list[dict], str | None]:
+    """
+        One page of personal and broadcast notifications merged newest first
+
+        Both collections are read with the same (time, id) keyset, one extra
+        row each, so the merged page and its cursor stay consistent.
+    """
+    page_size = clamp_page_size(limit)
+    user = await load_inbox_user(user_id)
+    if not user:
+        return [], None
+
+    personal_where = {"userId": user_id}
+    broadcast_where = visible_broadcasts(user)
+    if unread_only:
+        personal_where["isRead"] = False
+        broadcast_where = unread_broadcasts(user)
+
+    order = [{"time": "desc"}, {"id": "desc"}]
+    personal, broadcasts = await asyncio.gather(
+        db.notifications.find_many(
+            where=keyset_where(personal_where, cursor, "time"),
+            order=order,
+            take=page_size + 1
+        ),
+        db.broadcastnotifications.find_many(
+            where=keyset_where(broadcast_where, cursor, "time"),
+            order=order,
+            take=page_size + 1
+        )
+    )
+
+    read_ids = set()
+    if broadcasts and not unread_only:
+        receipts = await db.broadcastreceipts.find_many(
+            where={"userId": user_id, "broadcastId": {"in": [broadcast.id for broadcast in broadcasts]}}
+        )
+        read_ids = {receipt.broadcastId for receipt in receipts}
+
+    items = [{**notification.model_dump(), "kind": "notification", "broadcast": False} for notification in personal]
+    items.extend(
+        {
+            "id": broadcast.id,
+            "title": broadcast.title,
+            "description": broadcast.description,
+            "time": broadcast.time,
+            "createdAt": broadcast.createdAt,
+            "userId": user_id,
+            "isRead": broadcast.id in read_ids,
+            "kind": "broadcast",
+            "broadcast": True
+        }
+        for broadcast in broadcasts
+    )
+    items.sort(key=lambda item: (item["time"], item["id"]), reverse=True)
+
+    if len(items) <= page_size:
+        return items, None
+
+    page = items[:page_size]
+    return page, encode_cursor(page[-1]["time"], page[-1]["id"])
+
+
+# =======================================================
+async def write_receipts(user_id: str, broadcast_ids: list[str]) -> int:
+    if not broadcast_ids:
+        return 0
+
+    data = [{"userId": user_id, "broadcastId": broadcast_id} for broadcast_id in broadcast_ids]
+    try:
+        created = await db.broadcastreceipts.create_many(data=data)
+    except UniqueViolationError:
+        # A concurrent request read some of these first
+        created = 0
+        for row in data:
+            try:
+                await db.broadcastreceipts.create(data=row)
+                created += 1
+            except UniqueViolationError:
+                pass
+
+    await increment_unread({user_id: created}, field="readBroadcasts")
+    return created
+
+
+async def mark_read(user_id: str, notification_ids: list[str] | None = None) -> int:
+    """
+        Mark some, or with no IDs all, of a user's unread notifications read
+
+        Personal notifications flip in one update_many that only matches
+        unread documents; broadcasts get a receipt, guarded by the unique
+        (userId, broadcastId) index. Either way the counters move by exactly
+        the number marked, even when requests overlap.
+    """
+    where = {"userId": user_id, "isRead": False}
+    if notification_ids is not None:
+        where["id"] = {"in": notification_ids}
+
+    marked = await db.notifications.update_many(
+        where=where,
+        data={"isRead": True}
+    )
+    await decrement_unread(user_id, marked)
+
+    user = await load_inbox_user(user_id)
+    if not user or notification_ids == []:
+        return marked
+
+    broadcast_where = unread_broadcasts(user)
+    if notification_ids is not None:
+        broadcast_where["id"] = {"in": notification_ids}
+
+    broadcasts = await db.broadcastnotifications.find_many(where=broadcast_where)
+    return marked + await write_receipts(user_id, [broadcast.id for broadcast in broadcasts])
@@ -0,0 +1,131 @@
+from backend.db.prisma_client import db
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+from .outbox import WORKER_ID
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+JOB_SWEEP_SECONDS = float(os.getenv("JOB_SWEEP_SECONDS", "15"))
+JOB_SWEEP_BATCH_SIZE = int(os.getenv("JOB_SWEEP_BATCH_SIZE", "20"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_SECONDS = float(os.getenv("JOB_RETRY_SECONDS", "60"))
+
+
+# jobType -> async handler(job); handlers are registered by the modules that own them
+job_handlers = {}
+
+
+def register_job_handler(job_type: str):
+    def decorator(handler):
+        job_handlers[job_type] = handler
+        return handler
+    return decorator
+
+
+def due_jobs(now: datetime) -> dict:
+    """
+        Pending jobs whose runAt has passed, plus running jobs whose lease
+        expired because the worker holding it died
+    """
+    return {
+        "OR": [
+            {"status": "pending", "runAt": {"lte": now}},
+            {"status": "running", "leaseExpiresAt": {"lt": now}}
+        ]
+    }
+
+
+async def claim_jobs(limit: int = JOB_SWEEP_BATCH_SIZE) -> list:
+    """
+        Lease up to `limit` due Jobs to this worker
+
+        The claim is a conditional update_many that only matches while the
+        job is still due, so when several API workers sweep at once each job
+        is run by exactly one of them.
+    """
+    now = datetime.now(timezone.utc)
+    candidates = await db.jobs.find_many(
+        where=due_jobs(now),
+        order={"runAt": "asc"},
+        take=limit
+    )
+
+    lease_expires_at = now + timedelta(seconds=JOB_LEASE_SECONDS)
+    claimed = []
+    for job in candidates:
+        won = await db.jobs.update_many(
+            where={"id": job.id, **due_jobs(now)},
+            data={
+                "status": "running",
+                "leaseOwner": WORKER_ID,
+                "leaseExpiresAt": lease_expires_at
+            }
+        )
+        if won:
+            claimed.append(job)
+
+    return claimed
+
+
+async def run_job(job):
+    """
+        Run one leased job and record the outcome
+
+        Outcome writes are conditioned on still holding the lease, so a job
+        rescheduled while it ran is left pending for its new run time.
+    """
+    handler = job_handlers.get(job.jobType)
+    attempts = (job.attempts or 0) + 1
+
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for {job.jobType} jobs")
+        await handler(job)
+    except Exception as e:
+        logger.error(f"Job {job.id} ({job.jobType}) failed on attempt {attempts}: {e}")
+        if attempts >= JOB_MAX_ATTEMPTS:
+            data = {"status": "undeliverable"}
+        else:
+            data = {
+                "status": "pending",
+                "runAt": datetime.now(timezone.utc) + timedelta(seconds=JOB_RETRY_SECONDS * attempts)
+            }
+
+        await db.jobs.update_many(
+            where={"id": job.id, "leaseOwner": WORKER_ID},
+            data={
+                **data,
+                "attempts": attempts,
+                "errorMessage": str(e)[:1000],
+                "leaseOwner": None,
+                "leaseExpiresAt": None
+            }
+        )
+        return
+
+    await db.jobs.update_many(
+        where={"id": job.id, "leaseOwner": WORKER_ID},
+        data={
+            "status": "sent",
+            "sentAt": datetime.now(timezone.utc),
+            "attempts": attempts,
+            "errorMessage": None,
+            "leaseOwner": None,
+            "leaseExpiresAt": None
+        }
+    )
+
+
+async def sweep_jobs(limit: int = JOB_SWEEP_BATCH_SIZE) -> int:
+    """
+        Claim and run one batch of due jobs; returns the number claimed
+    """
+    batch = await claim_jobs(limit)
+    if batch:
+        await asyncio.gather(*(run_job(job) for job in batch))
+    return len(batch)
@@ -0,0 +1,230 @@
+from email.message import EmailMessage
+from collections import deque
+from dotenv import load_dotenv
+import asyncio
+import logging
+import os
+import smtplib
+import ssl
+import time
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_USE_SSL = os.getenv("SMTP_USE_SSL", "true").lower() == "true"
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "false").lower() == "true"
+SMTP_USERNAME = os.getenv("SMTP_USERNAME") or os.getenv("YAGMAIL_EMAIL")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD") or os.getenv("YAGMAIL_APP_PASSWORD")
+SMTP_FROM = os.getenv("SMTP_FROM") or SMTP_USERNAME or "no-reply@localhost"
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+
+
+def build_message(
+        to: str,
+        subject: str,
+        contents: str,
+        html: str | None = None,
+        sender: str = SMTP_FROM,
+        message_id: str | None = None
+) -> EmailMessage:
+    """
+        Plain-text message, with an HTML alternative when one is given
+    """
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = to
+    message["Subject"] = subject
+    if message_id is not None:
+        message["Message-ID"] = message_id
+    message.set_content(contents)
+    if html is not None:
+        message.add_alternative(html, subtype="html")
+    return message
+
+
+# Per-message refusals; smtplib resets the session before raising these
+MESSAGE_REJECTED = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+class SMTPPool:
+    """
+        Pool of reusable SMTP connections driven from asyncio
+
+        Up to pool_size messages are in flight at once, each on its own
+        connection in a worker thread, so the event loop never blocks on SMTP
+        and one slow recipient only holds one connection. Connections are
+        opened lazily, reused between messages and reopened once when the
+        server drops them.
+    """
+
+    def __init__(
+            self,
+            host: str = SMTP_HOST,
+            port: int = SMTP_PORT,
+            username: str | None = SMTP_USERNAME,
+            password: str | None = SMTP_PASSWORD,
+            use_ssl: bool = SMTP_USE_SSL,
+            starttls: bool = SMTP_STARTTLS,
+            pool_size: int = SMTP_POOL_SIZE,
+            timeout: float = SMTP_TIMEOUT_SECONDS
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.starttls = starttls
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+
+        self._idle = None
+        self._connections = []
+
+        self.sent = 0
+        self.failed = 0
+        self.reconnects = 0
+        self._latencies = deque(maxlen=1000)
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.use_ssl:
+            conn = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.starttls:
+                conn.starttls(context=ssl.create_default_context())
+
+        if self.username and self.password:
+            conn.login(self.username, self.password)
+        return conn
+
+    def _send_on(self, slot: list, message: EmailMessage):
+        """
+            Runs in a worker thread; slot is a one-item list holding the connection
+
+            Only a dropped or failed connection is retried, once, on a fresh
+            connection. The server refusing the message itself (5xx, or a 4xx
+            the outbox backs off from) is raised straight away; smtplib has
+            already reset the session, so the connection stays pooled.
+        """
+        for attempt in range(2):
+            try:
+                if slot[0] is None:
+                    slot[0] = self._connect()
+                slot[0].send_message(message)
+                return
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError) as e:
+                error = e
+            except MESSAGE_REJECTED:
+                raise
+            except smtplib.SMTPException:
+                self._close(slot)
+                raise
+            except OSError as e:
+                # Socket-level failure (SMTPException is an OSError, handled above)
+                error = e
+
+            self._close(slot)
+            if attempt:
+                raise error
+            self.reconnects += 1
+
+    def _close(self, slot: list):
+        conn, slot[0] = slot[0], None
+        if conn is None:
+            return
+        try:
+            conn.quit()
+        except Exception:
+            conn.close()
+
+    def _slots(self) -> asyncio.Queue:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for _ in range(self.pool_size):
+                slot = [None]
+                self._connections.append(slot)
+                self._idle.put_nowait(slot)
+        return self._idle
+
+    async def send_message(self, message: EmailMessage, ready=None) -> bool:
+        """
+            Send on the next free connection
+
+            `ready` is an optional async check run once a connection is free,
+            right before sending; when it returns False nothing is sent and
+            False is returned.
+        """
+        idle = self._slots()
+        slot = await idle.get()
+        try:
+            if ready is not None and not await ready():
+                return False
+
+            started_at = time.perf_counter()
+            try:
+                await asyncio.to_thread(self._send_on, slot, message)
+            except Exception:
+                self.failed += 1
+                raise
+            finally:
+                self._latencies.append(time.perf_counter() - started_at)
+            self.sent += 1
+            return True
+        finally:
+            idle.put_nowait(slot)
+
+    async def send(
+            self,
+            to: str,
+            subject: str,
+            contents: str,
+            html: str | None = None,
+            message_id: str | None = None,
+            ready=None
+    ) -> bool:
+        return await self.send_message(build_message(to, subject, contents, html, message_id=message_id), ready=ready)
+
+    async def send_bulk(self, recipients, subject: str, contents: str, html: str | None = None) -> int:
+        """
+            Send the same message to many recipients in parallel
+
+            Failures are logged per recipient and never stop the batch.
+            Returns the number of messages delivered.
+        """
+        recipients = list(recipients)
+        results = await asyncio.gather(
+            *(self.send(to, subject, contents, html) for to in recipients),
+            return_exceptions=True
+        )
+
+        delivered = 0
+        for to, result in zip(recipients, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to send '{subject}' to {to}: {result}")
+            else:
+                delivered += 1
+        return delivered
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        count = len(latencies)
+        return {
+            "poolSize": self.pool_size,
+            "open": sum(1 for slot in self._connections if slot[0] is not None),
+            "sent": self.sent,
+            "failed": self.failed,
+            "reconnects": self.reconnects,
+            "avgLatencyMs": (sum(latencies) / count) * 1000 if count else 0.0,
+            "p95LatencyMs": latencies[int(count * 0.95) - 1 if count > 1 else 0] * 1000 if count else 0.0,
+            "maxLatencyMs": latencies[-1] * 1000 if count else 0.0
+        }
+
+    def close(self):
+        for slot in self._connections:
+            self._close(slot)
+
+
+mailer = SMTPPool()
@@ -0,0 +1,270 @@
+from dataclasses import dataclass, fields, asdict
+from functools import lru_cache
+from string import Template
+from typing import NamedTuple
+from .auth.utils import convert_iso_date_to_string
+import html
+
+
+# =======================================================
+# * Typed contexts. Frozen so a rendered message can be cached by context.
+
+@dataclass(frozen=True)
+class EventContext:
+    event_name: str
+    event_date: str
+
+    @classmethod
+    def from_event(cls, event):
+        return cls(event_name=event.name, event_date=convert_iso_date_to_string(event.date))
+
+
+@dataclass(frozen=True)
+class WaitlistContext:
+    event_name: str
+    event_date: str
+    who: str
+
+
+@dataclass(frozen=True)
+class ReminderContext:
+    first_name: str
+    event_name: str
+    event_date: str
+
+
+@dataclass(frozen=True)
+class AnnouncementContext:
+    title: str
+    description: str
+
+
+@dataclass(frozen=True)
+class PasswordResetContext:
+    link: str
+
+
+@dataclass(frozen=True)
+class DigestContext:
+    count: int
+
+
+class RenderedMessage(NamedTuple):
+    """
+        Unpacks straight into enqueue_email / enqueue_bulk_email as
+        (subject, contents, html, digest)
+    """
+    subject: str
+    text: str
+    html: str
+    digest: str | None = None
+
+
+# =======================================================
+HTML_LAYOUT = Template(
+    '<!DOCTYPE html><html><body style="font-family: Arial, sans-serif; line-height: 1.5;">'
+    '<p>$body</p></body></html>'
+)
+
+
+def text_to_html_body(text: str) -> str:
+    return html.escape(text, quote=False).replace("\n\n", "</p><p>").replace("\n", "<br>")
+
+
+def text_to_html_template(text: str) -> Template:
+    """
+        Derive the HTML part from the plain-text template once, at startup
+
+        Literal text is escaped and paragraphs / line breaks become markup;
+        placeholders survive because escaping never touches `$name`.
+    """
+    return Template(HTML_LAYOUT.substitute(body=text_to_html_body(text)))
+
+
+class MessageTemplate:
+    """
+        A subject, plain-text body and optional in-app summary, compiled once
+
+        Placeholders are checked against the context type when the template
+        is registered, so a typo fails at import time rather than mid-send.
+        `digest` names the outbox coalescing window the email may wait in.
+    """
+
+    def __init__(
+            self,
+            key: str,
+            context_type: type,
+            subject: str,
+            text: str,
+            summary: str | None = None,
+            digest: str | None = None
+    ):
+        self.key = key
+        self.context_type = context_type
+        self.digest = digest
+        self.subject = Template(subject)
+        self.text = Template(text)
+        self.html = text_to_html_template(text)
+        self.summary = Template(summary) if summary is not None else None
+
+        allowed = {field.name for field in fields(context_type)}
+        for template in (self.subject, self.text, self.summary):
+            if template is None:
+                continue
+            unknown = set(template.get_identifiers()) - allowed
+            if unknown or not template.is_valid():
+                raise ValueError(f"Template {key} uses unknown placeholders {sorted(unknown)}")
+
+    def render(self, context) -> RenderedMessage:
+        if not isinstance(context, self.context_type):
+            raise TypeError(f"Template {self.key} expects {self.context_type.__name__}, got {type(context).__name__}")
+
+        values = asdict(context)
+        escaped = {name: text_to_html_body(str(value)) for name, value in values.items()}
+        return RenderedMessage(
+            subject=self.subject.substitute(values),
+            text=self.text.substitute(values),
+            html=self.html.substitute(escaped),
+            digest=self.digest
+        )
+
+    def render_summary(self, context) -> str:
+        if self.summary is None:
+            raise LookupError(f"Template {self.key} has no summary")
+        return self.summary.substitute(asdict(context))
+
+
+templates = {}
+
+
+def register(template: MessageTemplate):
+    templates[template.key] = template
+
+
+@lru_cache(maxsize=1024)
+def render(key: str, context) -> RenderedMessage:
+    """
+        Render a registered template; identical contexts are served from cache,
+        so a message shared by a whole batch is rendered once
+    """
+    return templates[key].render(context)
+
+
+@lru_cache(maxsize=1024)
+def render_summary(key: str, context) -> str:
+    return templates[key].render_summary(context)
+
+
+def render_digest(messages) -> RenderedMessage:
+    """
+        Combine a recipient's queued (subject, contents) emails into one
+    """
+    header = templates["digest"].render(DigestContext(count=len(messages)))
+    sections = [f"{subject}\n\n{contents}" for subject, contents in messages]
+    text = "\n\n-----\n\n".join([header.text, *sections])
+    return RenderedMessage(
+        subject=header.subject,
+        text=text,
+        html=HTML_LAYOUT.substitute(body=text_to_html_body(text))
+    )
+
+
+# =======================================================
+# * Registry
+
+register(MessageTemplate(
+    "event_announced", EventContext,
+    subject="Check Out Our New Event at Wonderhood: $event_name",
+    text="Hello,\n\nCheck out our new event at Wonderhood. We hope to see you there.\n\nBest,\n\nWonderhood Team",
+    digest="announcement"
+))
+
+register(MessageTemplate(
+    "event_updated", EventContext,
+    subject="Wonderhood: $event_name Update",
+    text="Hello,\n\nThe $event_name has been rescheduled to $event_date. We hope to see you there!\n\nBest,\n\nWonderhood Team"
+))
+
+register(MessageTemplate(
+    "event_cancelled", EventContext,
+    subject="Wonderhood: $event_name Cancellation",
+    text="Hello,\n\nWe regret to inform you that the $event_name event on $event_date has been cancelled. Please take a look at our website for upcoming events.\n\nBest,\n\nWonderhood Team"
+))
+
+register(MessageTemplate(
+    "user_enrolled", EventContext,
+    subject="Enrollment Confirmation: $event_name",
+    text="Hello,\n\nThis email confirms that you are enrolled for the $event_name event on $event_date. If you are no longer available to join the event, please make changes here: .\n\nBest,\n\nWonderhood Team",
+    summary="Confirmation for event $event_name",
+    digest="confirmation"
+))
+
+register(MessageTemplate(
+    "child_enrolled", EventContext,
+    subject="Enrollment Confirmation: $event_name",
+    text="Hello,\n\nThis email confirms that your child has been enrolled for the $event_name event at Wonderhood for $event_date.\n\nWe look forward to see you there!\n\nBest,\n\nWonderhood Team",
+    summary="Confirmation for event $event_name",
+    digest="confirmation"
+))
+
+register(MessageTemplate(
+    "user_unenrolled", EventContext,
+    subject="Unenrollment Confirmation: $event_name",
+    text="Hello,\n\nThis email confirms that you have been unenrolled from the $event_name event at Wonderhood on $event_date. Please find more events at our website.\n\nBest,\n\nWonderhood Team",
+    digest="confirmation"
+))
+
+register(MessageTemplate(
+    "child_unenrolled", EventContext,
+    subject="Unenrollment Confirmation: $event_name",
+    text="Hello,\n\nThis email confirms that your child has been unenrolled from the $event_name on $event_date. Please find more events on our website.\n\nBest,\n\nWonderhood Team",
+    digest="confirmation"
+))
+
+register(MessageTemplate(
+    "waitlist_promoted", WaitlistContext,
+    subject="Enrollment Confirmation: $event_name",
+    text="Hello,\n\nA spot opened up and $who been moved from the waitlist into the $event_name event on $event_date.\n\nBest,\n\nWonderhood Team",
+    summary="Moved from the waitlist into event $event_name",
+    digest="confirmation"
+))
+
+register(MessageTemplate(
+    "volunteer_enrolled", EventContext,
+    subject="Volunteer Enrollment Confirmation: $event_name",
+    text="This email confirms that you are enrolled as a volunteer for the $event_name event on $event_date. If you are no longer available to join the event, please make changes here: .\n\nBest,\n\nWonderhood Team",
+    digest="confirmation"
+))
+
+register(MessageTemplate(
+    "volunteer_unenrolled", EventContext,
+    subject="Volunteer Unenrollment Confirmation: $event_name",
+    text="This email confirms that you are unenrolled as a volunteer for the $event_name event on $event_date.\n\nBest,\n\nWonderhood Team",
+    digest="confirmation"
+))
+
+register(MessageTemplate(
+    "event_reminder", ReminderContext,
+    subject="Reminder: Your Wonderhood event “$event_name” is tomorrow",
+    text="Hey $first_name,\n\nJust a quick reminder that “$event_name” with Wonderhood happens at $event_date.\n\nCheers!"
+))
+
+# Free-form admin messages (blasts and event notifications)
+register(MessageTemplate(
+    "announcement", AnnouncementContext,
+    subject="$title",
+    text="$description",
+    digest="announcement"
+))
+
+register(MessageTemplate(
+    "digest", DigestContext,
+    subject="Your Wonderhood updates ($count)",
+    text="Hello,\n\nHere is everything we sent you since our last email."
+))
+
+register(MessageTemplate(
+    "password_reset", PasswordResetContext,
+    subject="Password reset",
+    text="To reset your password, please click the link below:\n\n$link"
+))
@@ -1,72 +1,31 @@
-from fastapi import APIRouter, status, Depends, HTTPException, BackgroundTasks
-from backend.models.user_models import User
-from .auth.login import get_current_user
+from fastapi import APIRouter, status, Depends, HTTPException
+from .auth.login import get_current_principal, Principal
 from .auth.utils import enforce_admin, enforce_authentication, convert_iso_date_to_string
 from typing import Annotated
 from backend.db.prisma_client import db
+from backend.db.pagination import DEFAULT_PAGE_SIZE
 from datetime import datetime, timedelta, timezone
 import asyncio
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.executors.asyncio import AsyncIOExecutor
-from apscheduler.jobstores.mongodb import MongoDBJobStore
-from backend.models.interaction_models import NotificationUpdate, NotificationCreate
-import os
-import yagmail
-from pymongo import MongoClient
+from backend.models.interaction_models import NotificationUpdate, NotificationCreate, NotificationMarkRead
+from .audience import resolve_event_audience, iter_user_batches
+from prisma.partials import UserRecipient
+from .message_templates import render, ReminderContext, AnnouncementContext
+from .inbox import create_broadcast, inbox_page, mark_read, unread_count, increment_unread, decrement_unread
+from .review_stats import recompute_review_stats, REVIEW_STATS_REFRESH_SECONDS
+from .job_sweeper import register_job_handler, sweep_jobs, JOB_SWEEP_SECONDS
+from .outbox import enqueue_emails, enqueue_bulk_email, drain_outbox, purge_outbox, outbox_backlog, OUTBOX_POLL_SECONDS, OUTBOX_PURGE_SECONDS
 
 router = APIRouter()
 
-yagmail_app_password = os.getenv("YAGMAIL_APP_PASSWORD")
-yagmail_email = os.getenv("YAGMAIL_EMAIL")
-yag = yagmail.SMTP(yagmail_email, yagmail_app_password)
-
-def send_email_one_user(
-        user_email: str,
-        subject: str,
-        contents: str
-):
-    
-    """
-    Callback function for sending an email upon enrollment
-    """
-    yag.send(
-        to=user_email,
-        subject=subject,
-        contents=contents
-    )
-
-# =======================================================
-
-def send_email_multiple_users(
-    user_emails: list[str],
-    subject: str,
-    contents: str
-):
-    """
-        Call back function for sending an email to all enrolled users
-    """
-
-    for email in user_emails:
-        yag.send(
-            to=email,
-            subject=subject,
-            contents=contents
-        )
-
 # =======================================================
-# * Variables for connecting APScheduler to MongoDB
-
-MONGO_URI = os.getenv("DATABASE_URL")
-mongo_client = MongoClient(MONGO_URI)
+# * APScheduler only drives the periodic sweeps below. Jobs themselves live in
+# * the Jobs collection and are claimed with leases, so every API worker can
+# * run this scheduler without firing a job twice.
 
 scheduler = AsyncIOScheduler(
-    jobstores = {
-        "mongo": MongoDBJobStore(
-            client=mongo_client,
-            database=os.getenv("DATABASE_NAME"),
-            port=27017
-        )
-    }, executors={
+    executors={
         "default": AsyncIOExecutor()
     }
 )
@@ -99,76 +58,181 @@ def ensure_utc(dt: datetime) -> datetime:
 
 
 # =======================================================
-async def schedule_reminder(
-        user_id: str,
-        event_id: str,
-        event_date: datetime
-):
+def reminder_run_time(event_date: datetime) -> datetime:
     """
-    Callback function for handler creating a job instance and scheduling an event reminder
+        One day before the event, or shortly from now if that has passed
     """
-    # Create reminder run time
-    event_date = ensure_utc(parse_event_date(event_date))
-    run_at = event_date - timedelta(days=1)
+    run_at = ensure_utc(parse_event_date(event_date)) - timedelta(days=1)
     if run_at <= datetime.now(timezone.utc):
         run_at = datetime.now(timezone.utc) + timedelta(seconds=10)
+    return run_at
 
-    # Make job record
-    job = await db.jobs.create(
-        data = {
-            "runAt": run_at,
-            "reminderType": "email",
-            "status": "pending",
+
+async def schedule_reminder(
+        event_id: str,
+        event_date: datetime,
+        reschedule: bool = False,
+        reminder_type: str = "email",
+        user_ids: list[str] | None = None
+):
+    """
+    Make sure an event has its one reminder job
+
+    There is one Jobs row per (event, job type, reminder type), so every join
+    and enroll can call this without creating duplicates. Pass reschedule=True
+    when the event date changes to move the job and send the reminder again.
+
+    Pass the joining users as user_ids: if the job has already resolved its
+    recipients they are sent the reminder themselves, under the job's key.
+    """
+    job_key = {
+        "eventId_jobType_reminderType": {
+            "eventId": event_id,
             "jobType": "reminder",
-            "eventId": event_id
+            "reminderType": reminder_type
         }
-    )
+    }
 
-    scheduler.add_job(
-        # lambda allows us to pass a zero-argument callable func
-        # func=lambda: asyncio.run(schedule_reminder(job.id, user_id, event_id)),
-        func=send_email_and_reschedule,
-        trigger="date",
-        run_date=run_at,
-        id=job.id,
-        args=[user_id, event_id, event_date, job.id]
-    )
+    job = await db.jobs.find_unique(where=job_key)
+
+    if job is None:
+        run_at = reminder_run_time(event_date)
+        job = await db.jobs.upsert(
+            where=job_key,
+            data={
+                "create": {
+                    "runAt": run_at,
+                    "reminderType": reminder_type,
+                    "status": "pending",
+                    "jobType": "reminder",
+                    "eventId": event_id
+                },
+                "update": {}
+            }
+        )
+    elif reschedule:
+        # Dropping the lease means a sweeper mid-run on the old date cannot mark it sent
+        job = await db.jobs.update(
+            where={"id": job.id},
+            data={
+                "runAt": reminder_run_time(event_date),
+                "generation": {"increment": 1},
+                "status": "pending",
+                "attempts": 0,
+                "sentAt": None,
+                "errorMessage": None,
+                "leaseOwner": None,
+                "leaseExpiresAt": None
+            }
+        )
+
+    elif user_ids and job.status in ("running", "sent"):
+        await send_late_reminders(job, user_ids)
+
+    return job
 
 # =======================================================
+def reminder_key(job) -> str:
+    """
+        Outbox key prefix for a reminder job
 
-async def send_email_and_reschedule(
-        user_id: str,
-        event_id: str,
-        event_date: datetime,
-        job_record_id: str
-):
+        Keyed by job and reschedule generation, not run time (a failed run is
+        retried at a later runAt), so a retried job never sends twice while a
+        rescheduled event still gets a fresh reminder.
     """
-        Callback function for actually sending the one day reminder email and updating Jobs instance
+    return f"reminder:{job.id}:{job.generation or 0}"
+
+
+def reminder_messages(event, recipients) -> list[tuple]:
+    event_date = convert_iso_date_to_string(event.date)
+    messages = []
+    for recipient in recipients:
+        if not recipient.email:
+            continue
+        message = render("event_reminder", ReminderContext(
+            first_name=recipient.firstName,
+            event_name=event.name,
+            event_date=event_date
+        ))
+        messages.append((recipient.email, *message))
+    return messages
+
+
+async def send_late_reminders(job, user_ids: list[str]):
+    """
+        Remind users who joined after the event's reminder job resolved its
+        recipients; anyone the job already queued shares its key and is skipped
     """
-    # Query user and events for writing the message subject/body
-    user = await db.users.find_unique(where={"id": user_id})
-    event = await db.events.find_unique(where={"id": event_id})
+    event = await db.events.find_unique(where={"id": job.eventId})
+    if not event or ensure_utc(event.date) <= datetime.now(timezone.utc):
+        return
 
-    subject = f"Reminder: Your Wonderhood event “{event.name}” is tomorrow"
-    body = f"Hey {user.firstName},\n\nJust a quick reminder that “{event.name}” with Wonderhood happens at {convert_iso_date_to_string(event_date)}.\n\nCheers!"
-    
-    # Send the email with yagmail
-    yag.send(to=user.email, subject=subject, contents=body)
+    recipients = await UserRecipient.prisma(db).find_many(where={"id": {"in": list(user_ids)}})
+    await enqueue_emails(reminder_messages(event, recipients), key_prefix=reminder_key(job))
 
-    # Update jobs record
-    await db.jobs.update(
-        where={"id": job_record_id},
-        data={
-            "status": "sent", 
-            "sentAt": datetime.now(timezone.utc)
-            }
-    )
+
+@register_job_handler("reminder")
+async def send_event_reminders(job):
+    """
+        Job handler sending the one day reminder to everyone enrolled in an event
+
+        Recipients (enrolled users and the parents of enrolled children) are
+        resolved in bulk when the job fires and queued as one outbox batch.
+    """
+    event = await db.events.find_unique(where={"id": job.eventId})
+    if not event:
+        return
+
+    recipients = await resolve_event_audience(event, users=True, parents=True)
+    await enqueue_emails(reminder_messages(event, recipients), key_prefix=reminder_key(job))
 
 # =======================================================
 def start_scheduler():
     """
         Function for calling the APScheduler
+
+        Registers the periodic Jobs sweep, email outbox drain and purge, and
+        the review aggregate repair.
     """
+    scheduler.add_job(
+        func=sweep_jobs,
+        trigger="interval",
+        seconds=JOB_SWEEP_SECONDS,
+        id="jobs-sweep",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+    scheduler.add_job(
+        func=drain_outbox,
+        trigger="interval",
+        seconds=OUTBOX_POLL_SECONDS,
+        id="email-outbox",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+    scheduler.add_job(
+        func=purge_outbox,
+        trigger="interval",
+        seconds=OUTBOX_PURGE_SECONDS,
+        id="email-outbox-purge",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+    if REVIEW_STATS_REFRESH_SECONDS > 0:
+        # Every write is conditioned on the aggregates it read, so workers
+        # running it side by side never overwrite each other or an increment
+        scheduler.add_job(
+            func=recompute_review_stats,
+            trigger="interval",
+            seconds=REVIEW_STATS_REFRESH_SECONDS,
+            id="review-stats",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
     scheduler.start()
 
 
@@ -176,8 +240,7 @@ def start_scheduler():
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def blast_notification(
     notification: NotificationCreate,
-    current_user: Annotated[User, Depends(get_current_user)],
-    background_tasks: BackgroundTasks
+    current_user: Annotated[Principal, Depends(get_current_principal)]
 ):
     """
     Create a blast message that only admin can send
@@ -189,64 +252,140 @@ async def blast_notification(
 
     enforce_admin(current_user, "create blast message")
 
-    users = await db.users.find_many()
-    user_emails = [user.email for user in users]
+    # Stored once; each user's inbox merges it in and records a receipt on read
+    new_notification = await create_broadcast(
+        data={
+            "title": notification.title,
+            "description": notification.description,
+            "time": notification.time
+        }
+    )
 
-    # Add notification here
+    message = render("announcement", AnnouncementContext(title=notification.title, description=notification.description))
+    async for users in iter_user_batches():
+        await enqueue_bulk_email(
+            [user.email for user in users],
+            *message,
+            key_prefix=f"broadcast:{new_notification.id}"
+        )
 
-    notification_data = [
-    {
-        "title": notification.title,
-        "description": notification.description,
-        "userId": user.id,
-        "isRead": False,
-        "time": notification.time,
-        # "icon": icon
-    }
-    for user in users
-]
-    new_notification = await db.notifications.create_many(
-        data=notification_data
-    )
+    return {"notification": new_notification}
+
+# =======================================================
+@router.get("/outbox", status_code=status.HTTP_200_OK)
+async def get_outbox_backlog(
+    current_user: Annotated[Principal, Depends(get_current_principal)]
+):
+    """
+    Email outbox backlog depth and delivery throughput (admin only)
+    """
 
-    background_tasks.add_task(
-        send_email_multiple_users,
-        user_emails,
-        notification.title,
-        notification.description
+    enforce_authentication(current_user, "view the email outbox")
+    enforce_admin(current_user, "view the email outbox")
+
+    return await outbox_backlog()
+
+
+@router.post("/outbox/{message_id}/retry", status_code=status.HTTP_200_OK)
+async def retry_outbox_message(
+    message_id: str,
+    current_user: Annotated[Principal, Depends(get_current_principal)]
+):
+    """
+    Requeue a dead-lettered email for delivery (admin only)
+    """
+
+    enforce_authentication(current_user, "retry an email")
+    enforce_admin(current_user, "retry an email")
+
+    requeued = await db.emailoutbox.update_many(
+        where={"id": message_id, "status": "dead"},
+        data={
+            "status": "pending",
+            "attempts": 0,
+            "nextAttemptAt": datetime.now(timezone.utc)
+        }
     )
 
-    return {"notification": new_notification}
+    if not requeued:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dead-lettered email not found"
+        )
+
+    return {"message": "Email requeued for delivery"}
 
 # =======================================================
 @router.get("/", status_code=status.HTTP_200_OK)
 async def get_user_notifications(
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    unread_only: bool = False
 ):
     """
-    Get all notifications of a user
+    Get a page of a user's notifications, newest first
+    Personal notifications and admin broadcasts are merged; each item has a
+    "kind" of "notification" or "broadcast" (and "broadcast": true/false).
+    Either kind is marked read through PATCH /notifications/read; broadcasts
+    are shared documents and cannot be changed through PATCH /notifications/{id}
     Authenticate user
+
+    - **unread_only**: only notifications not yet read
     """
 
     enforce_authentication(current_user, "retireve notifications")
 
-    notifications = await db.notifications.find_many(
-        where={"userId": current_user.id}
+    notifications, next_cursor = await inbox_page(
+        current_user.id,
+        cursor=cursor,
+        limit=limit,
+        unread_only=unread_only
     )
 
-    if not notifications:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Unable to obtain notifications"
-        )
-    
-    return {"Notifications": notifications}
+    return {"Notifications": notifications, "next_cursor": next_cursor}
+
+
+@router.get("/unread-count", status_code=status.HTTP_200_OK)
+async def get_unread_notification_count(
+    current_user: Annotated[Principal, Depends(get_current_principal)]
+):
+    """
+    Number of unread notifications for the notification bell
+    Reads the user's maintained counter instead of counting documents
+    """
 
+    enforce_authentication(current_user, "retrieve the unread count")
+
+    return {"unread": await unread_count(current_user.id)}
+
+
+@router.patch("/read", status_code=status.HTTP_200_OK)
+async def mark_notifications_read(
+    payload: NotificationMarkRead,
+    current_user: Annotated[Principal, Depends(get_current_principal)]
+):
+    """
+    Mark the given notifications, or all of them when no IDs are sent, as read
+    IDs may be personal notifications or broadcasts (see the inbox "kind")
+    Only the current user's notifications are touched
+    """
+
+    enforce_authentication(current_user, "mark notifications read")
+
+    marked = await mark_read(current_user.id, payload.ids)
+
+    return {
+        "marked": marked,
+        "unread": await unread_count(current_user.id)
+    }
+
+# =======================================================
 @router.patch("/{notification_id}", status_code=status.HTTP_200_OK)
 async def update_notification(
     notification_id: str,
     notification_data: NotificationUpdate,
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_principal)]
 ):
     """
         Update a notification
@@ -261,6 +400,11 @@ async def update_notification(
     notification = await db.notifications.find_unique(where={"id": notification_id})
 
     if not notification:
+        if await db.broadcastnotifications.find_unique(where={"id": notification_id}):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Broadcasts are marked read through PATCH /notifications/read"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Notificaation not found"
@@ -280,6 +424,12 @@ async def update_notification(
         data=update_payload
     )
 
+    # Keep the owner's unread counter in step with isRead changes
+    if updated_notification.isRead and not notification.isRead:
+        await decrement_unread(notification.userId, 1)
+    elif notification.isRead and not updated_notification.isRead:
+        await increment_unread({notification.userId: 1})
+
     return {
         "notification": updated_notification,
         "message": "Notification updated successfully"
@@ -0,0 +1,490 @@
+from backend.db.prisma_client import db
+from prisma.errors import UniqueViolationError
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+from .mailer import mailer
+from .message_templates import render_digest
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "30"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+OUTBOX_RETENTION_DAYS = float(os.getenv("OUTBOX_RETENTION_DAYS", "14"))
+OUTBOX_PURGE_SECONDS = float(os.getenv("OUTBOX_PURGE_SECONDS", "3600"))
+
+# Written over the body of sensitive messages (password resets) once they
+# are delivered or dead, so live tokens are not kept in the outbox
+REDACTED = "[redacted]"
+
+# Digest windows in seconds per template category; 0 sends immediately
+DIGEST_WINDOWS = {
+    "confirmation": float(os.getenv("DIGEST_CONFIRMATION_SECONDS", "0")),
+    "announcement": float(os.getenv("DIGEST_ANNOUNCEMENT_SECONDS", "0"))
+}
+
+# Identifies this process as the holder of an outbox lease
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def email_key(*parts) -> str:
+    """
+        Stable idempotency key for a message, e.g. email_key("event-cancelled", event.id, email)
+    """
+    return hashlib.sha256(":".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+def backoff_delay(attempts: int) -> float:
+    """
+        Exponential backoff with full jitter, capped at OUTBOX_BACKOFF_MAX_SECONDS
+    """
+    ceiling = min(OUTBOX_BACKOFF_MAX_SECONDS, OUTBOX_BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def digest_fields(digest: str | None) -> dict:
+    """
+        Outbox columns for a message that may wait in a digest window
+
+        Windows are aligned to the epoch (a daily window closes at midnight
+        UTC), so every message a recipient gets in the same window is due at
+        the same moment and is delivered as one email.
+    """
+    window = DIGEST_WINDOWS.get(digest, 0) if digest else 0
+    if window <= 0:
+        return {}
+
+    now = datetime.now(timezone.utc).timestamp()
+    closes_at = (now // window + 1) * window
+    return {
+        "digest": digest,
+        "nextAttemptAt": datetime.fromtimestamp(closes_at, timezone.utc)
+    }
+
+
+# =======================================================
+async def enqueue_email(
+        to: str,
+        subject: str,
+        contents: str,
+        html: str | None = None,
+        digest: str | None = None,
+        sensitive: bool = False,
+        key: str | None = None,
+        client=db
+) -> bool:
+    """
+        Write one email to the outbox
+
+        Handlers enqueue after their own writes, so a crash in between can
+        drop a message but never duplicate it; a caller already inside
+        db.tx() can pass the transaction as `client` to make both atomic.
+        `sensitive` bodies are redacted once delivered or dead. Returns
+        False when a message with the same key was already queued.
+    """
+    try:
+        await client.emailoutbox.create(
+            data={
+                "idempotencyKey": key or uuid.uuid4().hex,
+                "to": to,
+                "subject": subject,
+                "contents": contents,
+                "html": html,
+                "sensitive": sensitive,
+                **digest_fields(digest)
+            }
+        )
+    except UniqueViolationError:
+        return False
+    return True
+
+
+async def enqueue_emails(messages, key_prefix: str | None = None, client=db) -> int:
+    """
+        Write a batch of (to, subject, contents, html, digest) emails to the outbox
+
+        With a key_prefix each recipient's key is derived from it, so repeating
+        the call never queues a recipient twice. Returns the number queued.
+    """
+    batch_id = key_prefix or uuid.uuid4().hex
+    keyed = {}
+    for to, subject, contents, html, digest in messages:
+        keyed.setdefault(email_key(batch_id, to), (to, subject, contents, html, digest))
+
+    if keyed and key_prefix:
+        existing = await client.emailoutbox.find_many(
+            where={"idempotencyKey": {"in": list(keyed)}}
+        )
+        for message in existing:
+            keyed.pop(message.idempotencyKey, None)
+
+    if not keyed:
+        return 0
+
+    data = [
+        {
+            "idempotencyKey": key,
+            "to": to,
+            "subject": subject,
+            "contents": contents,
+            "html": html,
+            **digest_fields(digest)
+        }
+        for key, (to, subject, contents, html, digest) in keyed.items()
+    ]
+
+    try:
+        return await client.emailoutbox.create_many(data=data)
+    except UniqueViolationError:
+        # Lost a race with a concurrent enqueue of the same batch
+        queued = 0
+        for row in data:
+            queued += await enqueue_email(
+                row["to"],
+                row["subject"],
+                row["contents"],
+                html=row["html"],
+                digest=row.get("digest"),
+                key=row["idempotencyKey"],
+                client=client
+            )
+        return queued
+
+
+async def enqueue_bulk_email(
+        recipients,
+        subject: str,
+        contents: str,
+        html: str | None = None,
+        digest: str | None = None,
+        key_prefix: str | None = None,
+        client=db
+) -> int:
+    """
+        Write the same email for many recipients to the outbox
+
+        The message is built once by the caller and shared by every row.
+    """
+    return await enqueue_emails(
+        ((to, subject, contents, html, digest) for to in recipients),
+        key_prefix=key_prefix,
+        client=client
+    )
+
+
+# =======================================================
+class OutboxStats:
+    """
+        In-process delivery counters for this worker
+    """
+
+    def __init__(self):
+        self.drains = 0
+        self.claimed = 0
+        self.delivered = 0
+        self.digests = 0
+        self.lost_leases = 0
+        self.retried = 0
+        self.dead = 0
+        self.last_drain_seconds = 0.0
+        self.started_at = time.monotonic()
+
+    def as_dict(self) -> dict:
+        uptime = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            "worker": WORKER_ID,
+            "drains": self.drains,
+            "claimed": self.claimed,
+            "delivered": self.delivered,
+            "digests": self.digests,
+            "lostLeases": self.lost_leases,
+            "retried": self.retried,
+            "dead": self.dead,
+            "deliveredPerMinute": self.delivered / uptime * 60,
+            "lastDrainMs": self.last_drain_seconds * 1000
+        }
+
+
+outbox_stats = OutboxStats()
+
+
+def claimable(now: datetime) -> dict:
+    """
+        Due pending messages, plus messages whose lease expired mid-delivery
+    """
+    return {
+        "OR": [
+            {"status": "pending", "nextAttemptAt": {"lte": now}},
+            {"status": "sending", "leaseExpiresAt": {"lt": now}}
+        ]
+    }
+
+
+async def claim_batch(limit: int = OUTBOX_BATCH_SIZE) -> list:
+    """
+        Lease up to `limit` due messages to this worker
+
+        Each message is claimed with a conditional update_many that only
+        matches while it is still claimable, so concurrent consumers never
+        deliver the same message.
+    """
+    now = datetime.now(timezone.utc)
+    candidates = await db.emailoutbox.find_many(
+        where=claimable(now),
+        order={"nextAttemptAt": "asc"},
+        take=limit
+    )
+
+    lease_expires_at = now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+    claimed = []
+    for message in candidates:
+        won = await db.emailoutbox.update_many(
+            where={"id": message.id, **claimable(now)},
+            data={
+                "status": "sending",
+                "leaseOwner": WORKER_ID,
+                "leaseExpiresAt": lease_expires_at
+            }
+        )
+        if won:
+            claimed.append(message)
+
+    return claimed
+
+
+async def claim_digest(messages: list) -> list:
+    """
+        Add the recipient's other queued digest messages to a claimed group
+
+        Messages still waiting for a later window ride along with the one
+        that is due, since an email is going out to that recipient anyway.
+    """
+    now = datetime.now(timezone.utc)
+    siblings = await db.emailoutbox.find_many(
+        where={
+            "to": messages[0].to,
+            "status": "pending",
+            "digest": {"in": list(DIGEST_WINDOWS)},
+            "id": {"not_in": [message.id for message in messages]}
+        },
+        order={"createdAt": "asc"}
+    )
+
+    lease_expires_at = now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+    claimed = list(messages)
+    for message in siblings:
+        won = await db.emailoutbox.update_many(
+            where={"id": message.id, "status": "pending"},
+            data={
+                "status": "sending",
+                "leaseOwner": WORKER_ID,
+                "leaseExpiresAt": lease_expires_at
+            }
+        )
+        if won:
+            claimed.append(message)
+
+    return claimed
+
+
+async def renew_lease(messages: list) -> bool:
+    """
+        Push the lease on a group out by OUTBOX_LEASE_SECONDS, right before
+        it is sent
+
+        A batch can wait a long time for a free SMTP connection. If any row
+        was reclaimed by another worker in the meantime the group is not
+        sent; rows still held go back to pending to be regrouped.
+    """
+    ids = [message.id for message in messages]
+    renewed = await db.emailoutbox.update_many(
+        where={"id": {"in": ids}, "status": "sending", "leaseOwner": WORKER_ID},
+        data={"leaseExpiresAt": datetime.now(timezone.utc) + timedelta(seconds=OUTBOX_LEASE_SECONDS)}
+    )
+    if renewed == len(ids):
+        return True
+
+    outbox_stats.lost_leases += 1
+    logger.warning(f"Outbox lease lost on {len(ids) - renewed} of {len(ids)} message(s) to {messages[0].to}; not sending")
+    if renewed:
+        await db.emailoutbox.update_many(
+            where={"id": {"in": ids}, "status": "sending", "leaseOwner": WORKER_ID},
+            data={"status": "pending", "leaseOwner": None, "leaseExpiresAt": None}
+        )
+    return False
+
+
+def redaction(messages: list) -> dict:
+    """
+        Extra fields for a final outcome write: blank the body of sensitive messages
+    """
+    if any(message.sensitive for message in messages):
+        return {"contents": REDACTED, "html": None}
+    return {}
+
+
+async def record_failure(message, error: Exception):
+    attempts = message.attempts + 1
+    if attempts >= OUTBOX_MAX_ATTEMPTS:
+        outbox_stats.dead += 1
+        logger.error(f"Outbox message {message.id} to {message.to} dead after {attempts} attempts: {error}")
+        data = {"status": "dead", **redaction([message])}
+    else:
+        outbox_stats.retried += 1
+        data = {
+            "status": "pending",
+            "nextAttemptAt": datetime.now(timezone.utc) + timedelta(seconds=backoff_delay(attempts))
+        }
+
+    await db.emailoutbox.update_many(
+        where={"id": message.id, "leaseOwner": WORKER_ID},
+        data={
+            **data,
+            "attempts": attempts,
+            "errorMessage": str(error)[:1000],
+            "leaseOwner": None,
+            "leaseExpiresAt": None
+        }
+    )
+
+
+async def deliver(messages: list):
+    """
+        Send a group of leased messages for one recipient as a single email
+        and record the outcome on each of them
+
+        Digest messages are grouped per recipient; everything else is a
+        group of one and goes out as written.
+    """
+    if messages[0].digest:
+        messages = await claim_digest(messages)
+
+    first = messages[0]
+    if len(messages) == 1:
+        subject, contents, html = first.subject, first.contents, first.html
+    else:
+        subject, contents, html, _ = render_digest([(message.subject, message.contents) for message in messages])
+
+    try:
+        sent = await mailer.send(
+            first.to,
+            subject,
+            contents,
+            html=html,
+            message_id=f"<{first.idempotencyKey}@wonderhood>",
+            ready=lambda: renew_lease(messages)
+        )
+    except Exception as e:
+        for message in messages:
+            await record_failure(message, e)
+        return
+
+    if not sent:
+        return
+
+    outbox_stats.delivered += len(messages)
+    if len(messages) > 1:
+        outbox_stats.digests += 1
+
+    sent_at = datetime.now(timezone.utc)
+    for attempts, sensitive in {(message.attempts, bool(message.sensitive)) for message in messages}:
+        group = [message for message in messages if message.attempts == attempts and bool(message.sensitive) == sensitive]
+        await db.emailoutbox.update_many(
+            where={
+                "id": {"in": [message.id for message in group]},
+                "leaseOwner": WORKER_ID
+            },
+            data={
+                **redaction(group),
+                "status": "sent",
+                "sentAt": sent_at,
+                "attempts": attempts + 1,
+                "errorMessage": None,
+                "leaseOwner": None,
+                "leaseExpiresAt": None
+            }
+        )
+
+
+def group_by_recipient(batch: list) -> list[list]:
+    groups = {}
+    single = []
+    for message in batch:
+        if message.digest:
+            groups.setdefault(message.to, []).append(message)
+        else:
+            single.append([message])
+    return single + list(groups.values())
+
+
+async def drain_outbox(limit: int = OUTBOX_BATCH_SIZE) -> int:
+    """
+        Claim and deliver one batch; returns the number of messages claimed
+    """
+    started_at = time.perf_counter()
+    batch = await claim_batch(limit)
+    if batch:
+        await asyncio.gather(*(deliver(group) for group in group_by_recipient(batch)))
+
+    outbox_stats.drains += 1
+    outbox_stats.claimed += len(batch)
+    outbox_stats.last_drain_seconds = time.perf_counter() - started_at
+    return len(batch)
+
+
+async def purge_outbox() -> int:
+    """
+        Delete sent and dead messages older than OUTBOX_RETENTION_DAYS
+
+        Sent messages age from sentAt, dead ones from their last attempt.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=OUTBOX_RETENTION_DAYS)
+    purged = await db.emailoutbox.delete_many(
+        where={
+            "OR": [
+                {"status": "sent", "sentAt": {"lt": cutoff}},
+                {"status": "dead", "updatedAt": {"lt": cutoff}}
+            ]
+        }
+    )
+    if purged:
+        logger.info(f"Purged {purged} outbox message(s) older than {OUTBOX_RETENTION_DAYS:g} day(s)")
+    return purged
+
+
+async def outbox_backlog() -> dict:
+    """
+        Backlog depth per status, oldest due message and recent throughput
+    """
+    now = datetime.now(timezone.utc)
+    pending, sending, dead, sent_last_hour = await asyncio.gather(
+        db.emailoutbox.count(where={"status": "pending"}),
+        db.emailoutbox.count(where={"status": "sending"}),
+        db.emailoutbox.count(where={"status": "dead"}),
+        db.emailoutbox.count(where={"status": "sent", "sentAt": {"gte": now - timedelta(hours=1)}})
+    )
+
+    oldest = await db.emailoutbox.find_first(
+        where={"status": "pending"},
+        order={"nextAttemptAt": "asc"}
+    )
+
+    return {
+        "pending": pending,
+        "sending": sending,
+        "dead": dead,
+        "sentLastHour": sent_last_hour,
+        "oldestPendingAgeSeconds": (now - oldest.createdAt).total_seconds() if oldest else 0.0
+    }
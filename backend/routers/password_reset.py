@@ -1,12 +1,14 @@
 from fastapi import APIRouter, HTTPException, status
 from backend.db.prisma_client import db
 from backend.models.user_models import PasswordResetRequest, PasswordResetPayload
-from backend.routers.auth.utils import hash_password
+from backend.routers.auth.hashing import hash_password_async
+from backend.routers.auth.cache import invalidate_principal
+from backend.routers.outbox import enqueue_email
+from backend.routers.message_templates import templates, PasswordResetContext
 from datetime import datetime, timedelta
 from jose import jwt
 from dotenv import load_dotenv
 import os
-import yagmail
 
 
 router = APIRouter()
@@ -16,8 +18,6 @@ load_dotenv()
 ALGORITHM = "HS256"
 SECRET_KEY = os.getenv("SECRET_KEY")
 
-yagmail_app_password = os.getenv("YAGMAIL_APP_PASSWORD")
-yagmail_email = os.getenv("YAGMAIL_EMAIL")
 
 
 @router.post("/forgot-password", status_code=status.HTTP_200_OK)
@@ -54,20 +54,14 @@ async def forgot_password(request: PasswordResetRequest):
     print("THIS IS THE EMAIL:", user.email)
     print("THIS IS THE TOKEN:", reset_token)
 
-    # Send the email
+    # Queue the email for the worker
     try:
-        yag = yagmail.SMTP(yagmail_email, yagmail_app_password)
         link = f"http://localhost:3000/reset-password/{reset_token}"
-        contents = (
-            "To reset your password, please click the link below:\n\n"
-            f"{link}"
-        )
+        # Rendered without the shared cache so reset tokens are not kept around
+        message = templates["password_reset"].render(PasswordResetContext(link=link))
 
-        yag.send(
-            to=user.email,
-            subject="Password reset",
-            contents=contents,
-        )
+        # Sensitive: the outbox redacts the link once the email is out
+        await enqueue_email(user.email, *message, sensitive=True)
 
     except Exception as e:
         print("Error sending email:", e)
@@ -109,12 +103,13 @@ async def reset_password(payload: PasswordResetPayload):
         raise HTTPException(status_code=404, detail="User not found")
 
     # Hash the new password
-    hashed_pw = hash_password(payload.new_password)
+    hashed_pw = await hash_password_async(payload.new_password)
 
     # Update the password
     await db.users.update(
         where={"email": email},
         data={"password": hashed_pw}
     )
+    invalidate_principal(email)
 
     return {"message": "Your password has been successfully reset"}
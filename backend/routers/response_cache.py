@@ -0,0 +1,136 @@
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from collections import OrderedDict
+from dotenv import load_dotenv
+import hashlib
+import json
+import os
+import time
+
+load_dotenv()
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+
+
+# Per-collection version counters; mutating handlers bump these so any cached
+# response built from an older version is rebuilt on the next read
+collection_versions = {
+    "events": 0,
+    "activities": 0,
+    "reviews": 0,
+}
+
+
+def bump_collection_version(*collections: str):
+    for collection in collections:
+        collection_versions[collection] = collection_versions.get(collection, 0) + 1
+
+
+class ResponseCache:
+    """
+        Bounded LRU of serialized JSON responses keyed by route and params
+
+        Each entry remembers the collection versions it was built from and is
+        only reused while those versions are unchanged. The TTL bounds how long
+        a worker can serve data changed by a different worker.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: tuple, versions: tuple):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        entry_versions, expires_at, body, etag = entry
+        if entry_versions != versions or expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return body, etag
+
+    def set(self, key: tuple, versions: tuple, body: bytes, etag: str):
+        if self.max_entries <= 0:
+            return
+
+        self._entries[key] = (versions, time.monotonic() + self.ttl_seconds, body, etag)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "notModified": self.not_modified,
+            "versions": dict(collection_versions)
+        }
+
+
+response_cache = ResponseCache()
+
+
+def render_json(content) -> bytes:
+    """
+        Serialize the same way FastAPI's JSONResponse does
+    """
+    return json.dumps(
+        jsonable_encoder(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in [tag.strip() for tag in if_none_match.split(",")]
+
+
+async def cached_json_response(request: Request, route: str, collections: tuple[str, ...], build) -> Response:
+    """
+        Serve `await build()` as JSON through the response cache
+
+        The key is the route name plus the path and query params. A matching
+        If-None-Match gets a 304 with no body.
+    """
+    key = (
+        route,
+        tuple(sorted(request.path_params.items())),
+        tuple(sorted(request.query_params.multi_items()))
+    )
+    versions = tuple(collection_versions.get(collection, 0) for collection in collections)
+
+    cached = response_cache.get(key, versions)
+    if cached is not None:
+        response_cache.hits += 1
+        body, etag = cached
+    else:
+        response_cache.misses += 1
+        body = render_json(await build())
+        etag = f'"{hashlib.sha256(body).hexdigest()}"'
+        response_cache.set(key, versions, body, etag)
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request, etag):
+        response_cache.not_modified += 1
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
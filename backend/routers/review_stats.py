@@ -0,0 +1,162 @@
+from backend.db.prisma_client import db
+from prisma.partials import EventRatings
+from collections import defaultdict
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+REVIEW_STATS_REFRESH_SECONDS = float(os.getenv("REVIEW_STATS_REFRESH_SECONDS", "86400"))
+
+
+# Events and Activities carry the same running review aggregates: a count, a
+# rating sum, one counter per star and the mean. The review routes move them
+# with increments; recompute_review_stats rebuilds them from the reviews.
+STAR_FIELDS = {1: "rating1Count", 2: "rating2Count", 3: "rating3Count", 4: "rating4Count", 5: "rating5Count"}
+
+
+def empty_stats() -> dict:
+    return {"reviewCount": 0, "ratingSum": 0, **{field: 0 for field in STAR_FIELDS.values()}}
+
+
+def rating_delta(added: int | None = None, removed: int | None = None) -> dict:
+    """
+        Per-field change for adding and/or removing one rating
+    """
+    delta = empty_stats()
+    for rating, sign in ((added, 1), (removed, -1)):
+        if rating is None:
+            continue
+        delta["reviewCount"] += sign
+        delta["ratingSum"] += sign * rating
+        delta[STAR_FIELDS[rating]] += sign
+    return {field: change for field, change in delta.items() if change}
+
+
+def average_rating(count: int | None, total: int | None) -> float | None:
+    return round((total or 0) / count, 2) if count and count > 0 else None
+
+
+async def refresh_average(collection, record):
+    """
+        Store the mean matching the counts an increment just returned
+
+        Conditioned on those counts, so when two reviews land together only
+        the write that saw the final counts sticks.
+    """
+    await collection.update_many(
+        where={"id": record.id, "reviewCount": record.reviewCount, "ratingSum": record.ratingSum},
+        data={"averageRating": average_rating(record.reviewCount, record.ratingSum)}
+    )
+
+
+async def apply_delta(collection, record_id: str, delta: dict):
+    record = await collection.update(
+        where={"id": record_id},
+        data={field: {"increment": change} for field, change in delta.items()}
+    )
+    if record:
+        await refresh_average(collection, record)
+    return record
+
+
+async def record_rating_change(event_id: str, added: int | None = None, removed: int | None = None):
+    """
+        Move an event's aggregates, and its activity's, for a created (added),
+        deleted (removed) or re-rated (both) review
+    """
+    delta = rating_delta(added, removed)
+    if not delta:
+        return
+
+    event = await apply_delta(db.events, event_id, delta)
+    if event:
+        await apply_delta(db.activities, event.activityId, delta)
+
+
+async def move_event_ratings(event, activity_id: str):
+    """
+        Carry an event's ratings over when it is moved to another activity
+    """
+    if not event.reviewCount or event.activityId == activity_id:
+        return
+
+    delta = {field: getattr(event, field) or 0 for field in empty_stats()}
+    await apply_delta(db.activities, event.activityId, {field: -change for field, change in delta.items()})
+    await apply_delta(db.activities, activity_id, delta)
+
+
+async def forget_event_ratings(event):
+    """
+        Take a deleted event's ratings out of its activity
+    """
+    if event.reviewCount:
+        delta = {field: -(getattr(event, field) or 0) for field in empty_stats()}
+        await apply_delta(db.activities, event.activityId, delta)
+
+
+# =======================================================
+def stats_changed(record, stats: dict) -> bool:
+    return any(getattr(record, field) != value for field, value in stats.items())
+
+
+async def repair_stats(collection, record, stats: dict) -> bool:
+    """
+        Overwrite a record's aggregates only while they still hold the values
+        read before the reviews were counted
+
+        A review that lands in between moves the counters, the write matches
+        nothing and the record is left for the next run, so the repair never
+        overwrites an increment. Counters that were never set (records the
+        backfill has not reached) cannot be matched and are not conditioned on.
+    """
+    read = {field: getattr(record, field) for field in empty_stats()}
+    repaired = await collection.update_many(
+        where={"id": record.id, **{field: value for field, value in read.items() if value is not None}},
+        data=stats
+    )
+    return bool(repaired)
+
+
+async def recompute_review_stats() -> int:
+    """
+        Rebuild every event's and activity's aggregates from the reviews
+
+        The stored aggregates are read first, then one group_by over reviews;
+        only records that drifted are written, each conditioned on what was
+        read. Returns the number of records updated.
+    """
+    events = await EventRatings.prisma(db).find_many()
+    activities = await db.activities.find_many()
+
+    rows = await db.reviews.group_by(
+        by=["eventId", "rating"],
+        count={"_all": True}
+    )
+
+    by_event = defaultdict(empty_stats)
+    for row in rows:
+        stats = by_event[row["eventId"]]
+        count = row["_count"]["_all"]
+        stats["reviewCount"] += count
+        stats["ratingSum"] += count * row["rating"]
+        stats[STAR_FIELDS[row["rating"]]] += count
+
+    by_activity = defaultdict(empty_stats)
+    updated = 0
+
+    for event in events:
+        stats = by_event.get(event.id) or empty_stats()
+        for field, value in stats.items():
+            by_activity[event.activityId][field] += value
+
+        stats = {**stats, "averageRating": average_rating(stats["reviewCount"], stats["ratingSum"])}
+        if stats_changed(event, stats) and await repair_stats(db.events, event, stats):
+            updated += 1
+
+    for activity in activities:
+        stats = by_activity.get(activity.id) or empty_stats()
+        stats = {**stats, "averageRating": average_rating(stats["reviewCount"], stats["ratingSum"])}
+        if stats_changed(activity, stats) and await repair_stats(db.activities, activity, stats):
+            updated += 1
+
+    return updated
@@ -1,21 +1,26 @@
 from fastapi import Depends, status, HTTPException, APIRouter
 from backend.db.prisma_client import db
+from backend.db.pagination import paginate
 from typing import Annotated
 from backend.models.interaction_models import ReviewUpdate
 from backend.models.user_models import User
-from .auth.login import get_current_user, get_current_active_user_by_email
+from .auth.login import get_current_user
 from .auth.utils import enforce_admin, enforce_authentication
+from .response_cache import bump_collection_version
+from .review_stats import record_rating_change
 from datetime import datetime
 
 router = APIRouter()
 
+REVIEW_UPDATE_ATTEMPTS = 5
+
 @router.get("/all", status_code=status.HTTP_200_OK)
 async def get_all_reviews(
         current_user: Annotated[User, Depends(get_current_user)],
         rating: int | None = None,
         event_id: str | None = None,
         parent_id: str | None = None,
-        skip: int = 0,
+        cursor: str | None = None,
         limit: int = 10
     ):
         """
@@ -40,22 +45,24 @@ async def get_all_reviews(
             if parent_id is not None:
                 filters["parentId"] = parent_id
 
-            reviews = await db.reviews.find_many(
+            reviews, next_cursor = await paginate(
+                db.reviews,
+                cursor=cursor,
+                limit=limit,
                 where=filters,
                 include={
                         "event": True,
                         "parent": True
-                },
-                skip=skip,
-                take=limit
+                }
             )
 
-            return {"reviews": reviews}
-        except HTTPException as e:
-            print(f'Errors fetching reviews due to {e}')
+            return {"reviews": reviews, "next_cursor": next_cursor}
+        except HTTPException:
+            raise
+        except Exception as e:
             raise HTTPException(
                 status_code=500,
-                detail="Failed to obtain review"
+                detail=f"Failed to obtain reviews: {str(e)}"
             )
 
 
@@ -63,7 +70,7 @@ async def get_all_reviews(
 async def update_review(
     review_id: str,
     review_data: ReviewUpdate,
-    current_user = Depends(get_current_active_user_by_email)
+    current_user: Annotated[User, Depends(get_current_user)]
 ):
      """
      Update the current user's review
@@ -97,9 +104,37 @@ async def update_review(
      payload["updatedAt"] = datetime.utcnow()
 
 
-     updated_review = await db.reviews.update(
-          where={"id": review_id},
-          data=payload
+    # Conditioned on the rating we read, so the aggregates move from the
+    # rating this write actually replaced even when edits overlap
+     for _ in range(REVIEW_UPDATE_ATTEMPTS):
+          updated = await db.reviews.update_many(
+               where={"id": review_id, "rating": review.rating},
+               data=payload
+          )
+          if updated:
+               break
+
+          review = await db.reviews.find_unique(
+               where={"id": review_id}
+          )
+          if not review:
+               raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Review not found"
+               )
+     else:
+          raise HTTPException(
+               status_code=status.HTTP_409_CONFLICT,
+               detail="Review is being updated by another request, please try again."
+          )
+
+     if review_data.rating is not None and review_data.rating != review.rating:
+          await record_rating_change(review.eventId, added=review_data.rating, removed=review.rating)
+          bump_collection_version("events", "activities")
+     bump_collection_version("reviews")
+
+     updated_review = await db.reviews.find_unique(
+          where={"id": review_id}
      )
 
      return {
@@ -142,14 +177,17 @@ async def delete_review(
         deleted_review = await db.reviews.delete(
             where={"id": review_id}
         )
+        if deleted_review:
+            await record_rating_change(deleted_review.eventId, removed=deleted_review.rating)
+        bump_collection_version("reviews", "events", "activities")
 
         if deleted_review:
             return "Review deleted successfully"
 
     except HTTPException:
          raise
-    except HTTPException as e:
+    except Exception as e:
               raise HTTPException(
               status_code=500,
-              detail="Failed to delete the review"
+              detail=f"Failed to delete the review: {str(e)}"
               )
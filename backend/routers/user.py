@@ -1,12 +1,19 @@
 from fastapi import APIRouter, status, HTTPException, Depends
 from pydantic import BaseModel, field_validator, ConfigDict
 from backend.db.prisma_client import db
-from typing import Annotated, Optional, List
-from backend.models.user_models import User, Child, Role, UserUpdateRequest, UserResponse, UserUpdateResponse
+from backend.db.pagination import paginate, DEFAULT_PAGE_SIZE
+from backend.db.fieldsets import FieldSet
+from prisma.partials import UserCard
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import Annotated, Optional
+from backend.models.user_models import User, Child, Role, UserUpdateRequest, UserResponse, UserUpdateResponse, UserListResponse
 from backend.models.interaction_models import Event, Review, Notification
 from datetime import datetime
-from .auth.login import get_current_active_user, get_current_active_user_by_email
-from .auth.utils import hash_password, enforce_authentication
+from .auth.login import get_current_active_user
+from .auth.utils import enforce_authentication
+from .auth.hashing import hash_password_async
+from .auth.cache import invalidate_principal
 
 
 router = APIRouter()
@@ -15,24 +22,56 @@ router = APIRouter()
 UserResponse.model_rebuild()
 User.model_rebuild()
 UserUpdateResponse.model_rebuild()
-
-@router.get("/", response_model=List[UserResponse])
-async def get_all_users():
-    # MAY NEED TO ADD PAGINATION
+UserListResponse.model_rebuild()
+
+
+# Selectable with ?fields= and ?include= on GET /user/; password is never selectable
+USER_LIST_FIELDS = FieldSet(
+    fields={
+        "id", "firstName", "lastName", "email", "phoneNumber", "role", "avatar",
+        "address", "city", "state", "zipCode", "createdAt", "updatedAt", "childIDs", "eventIDs"
+    },
+    relations={"children"},
+    default_relations={"children"},
+    required={"createdAt"},
+    partials=(UserCard,)
+)
+
+@router.get("/", response_model=UserListResponse)
+async def get_all_users(
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    fields: Optional[str] = None,
+    include: Optional[str] = None
+):
     """
-    Get all users from the database.
+    Get a page of users from the database, newest first.
+
+    Pass ?fields= (and ?include=children) to return only those parts of
+    each user; ?include= alone drops or keeps the children.
 
     Returns:
-        List[UserResponse]: List of all users
+        UserListResponse: The page of users and the cursor for the next page
     """
+    selection = USER_LIST_FIELDS.select(fields, include)
+
     try:
-        all_users = await db.users.find_many(
-            include={
-                "children": True
-            }
+        users, next_cursor = await paginate(
+            selection.client(db.users, db),
+            cursor=cursor,
+            limit=limit,
+            include=selection.include
         )
-        return all_users
-    except HTTPException as e:
+        if selection.fields is not None:
+            # A sparse user does not fit UserResponse; serialize it as selected
+            return JSONResponse(jsonable_encoder({
+                "users": [selection.project(user) for user in users],
+                "next_cursor": next_cursor
+            }))
+        return {"users": users, "next_cursor": next_cursor}
+    except HTTPException:
+        raise
+    except Exception as e:
         print(f"Error fetching users: {e}")
         raise HTTPException(
             status_code=500,
@@ -41,7 +80,7 @@ async def get_all_users():
 
 # get select user
 @router.get("/me", response_model=UserResponse)
-async def get_current_user(
+async def get_current_user_profile(
     current_user: Annotated[User, Depends(get_current_active_user)]
 ):
     """
@@ -86,7 +125,7 @@ async def get_current_user(
 @router.patch("/", response_model=UserUpdateResponse)
 async def update_user(
     update_data: UserUpdateRequest,
-    current_user = Depends(get_current_active_user_by_email)
+    current_user: Annotated[User, Depends(get_current_active_user)]
 ):
     """
     Update the current user's profile information.
@@ -120,7 +159,7 @@ async def update_user(
 
         # Special handling for password - should be hashed
         if 'password' in update_fields:
-            update_fields['password'] = hash_password(update_fields['password'])
+            update_fields['password'] = await hash_password_async(update_fields['password'])
 
         # Add updated timestamp to database update
         update_fields['updatedAt'] = datetime.utcnow()
@@ -148,6 +187,9 @@ async def update_user(
                 detail="User not found"
             )
 
+        # Drop the cached principal so the next request sees the new profile
+        invalidate_principal(current_user.email)
+
         # **Convert ORM → Pydantic here:**
         user_resp = UserResponse.from_orm(updated_user)
 
@@ -183,6 +225,8 @@ async def delete_user(
         deleted_user = await db.users.delete(
                 where={"id": current_user.id}
             )
+        invalidate_principal(current_user.email)
+
         if deleted_user:
             return "User profile deleted successfully"
 
@@ -0,0 +1,42 @@
+from fastapi import HTTPException
+import asyncio
+
+
+async def run_concurrently(*lookups):
+    """
+        Await independent lookups at once and return their results in order
+
+        The first lookup to raise cancels the rest and its exception is
+        re-raised as is, so an HTTPException reaches the client unchanged.
+    """
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(lookup) for lookup in lookups]
+    except* Exception as failed:
+        raise failed.exceptions[0]
+
+    return [task.result() for task in tasks]
+
+
+async def require_ids(collection, ids, status_code: int, detail: str):
+    """
+        Raise unless every ID in `ids` exists in `collection`
+
+        Counts instead of loading the documents; no IDs costs no query.
+    """
+    if not ids:
+        return
+
+    found = await collection.count(where={"id": {"in": ids}})
+    if found != len(ids):
+        raise HTTPException(status_code=status_code, detail=detail)
+
+
+async def require_record(collection, record_id: str, status_code: int, detail: str):
+    """
+        Load one document by ID, raising when it does not exist
+    """
+    record = await collection.find_unique(where={"id": record_id})
+    if not record:
+        raise HTTPException(status_code=status_code, detail=detail)
+    return record
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, status, Depends, HTTPException
 from backend.db.prisma_client import db
+from backend.db.pagination import paginate, DEFAULT_PAGE_SIZE
 from typing import Annotated
 from backend.models.user_models import User, VolunteerCreate, VolunteerUpdate
 from .auth.login import get_current_user
@@ -28,27 +29,26 @@ async def my_opportunities(current_user: Annotated[User, Depends(get_current_use
 async def list_all_applications(
     current_user: Annotated[User, Depends(get_current_user)],
     kind: str = "all",  # "all" | "general"
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
 ):
     """
     Admin-only listing of volunteer applications.
     - kind="all": return every volunteer record
     - kind="general": return only *general* apps (those with `generalAppliedAt`
       and without any connected opportunity IDs)
-    Results are sorted newest-first by createdAt (tz-aware fallback applied).
+    Results are sorted newest-first by createdAt and cursor paginated.
     """
     enforce_authentication(current_user)
     enforce_admin(current_user)
 
-    vols = await db.volunteers.find_many()
-
+    filters = {}
     if kind.lower() == "general":
-        vols = [v for v in vols if getattr(v, "generalAppliedAt", None) is not None]
+        filters["generalAppliedAt"] = {"not": None}
 
-    # Sort newest-first; use a tz-aware epoch as a safe fallback
-    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
-    vols.sort(key=lambda v: getattr(v, "createdAt", None) or epoch, reverse=True)
+    vols, next_cursor = await paginate(db.volunteers, cursor=cursor, limit=limit, where=filters)
 
-    return {"volunteers": vols}
+    return {"volunteers": vols, "next_cursor": next_cursor}
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
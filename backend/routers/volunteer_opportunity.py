@@ -294,31 +294,35 @@
 
 from fastapi import APIRouter, status, Depends, HTTPException
 from backend.db.prisma_client import db
+from backend.db.pagination import paginate, DEFAULT_PAGE_SIZE
 from typing import Annotated
-from backend.models.user_models import User
 from backend.models.interaction_models import VolunteerOpportunityCreate, VolunteerOpportunityUpdate
-from .auth.login import get_current_user
+from .auth.login import get_current_principal, Principal
 from .auth.utils import enforce_admin, enforce_authentication
 
 router = APIRouter()
 
 # -------- Public ----------
 @router.get("/public", status_code=200)
-async def list_public_opportunities():
-    opps = await db.volunteeropportunities.find_many()
-    return {"opportunities": opps}
+async def list_public_opportunities(cursor: str | None = None, limit: int = DEFAULT_PAGE_SIZE):
+    opps, next_cursor = await paginate(db.volunteeropportunities, cursor=cursor, limit=limit)
+    return {"opportunities": opps, "next_cursor": next_cursor}
 
 
 # -------- LIST (admin only) ----------
 @router.get("/", status_code=200)
-async def list_opportunities(current_user: Annotated[User, Depends(get_current_user)]):
+async def list_opportunities(
+    current_user: Annotated[Principal, Depends(get_current_principal)],
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE
+):
     enforce_authentication(current_user); enforce_admin(current_user)
-    items = await db.volunteeropportunities.find_many()
-    return {"opportunities": items}
+    items, next_cursor = await paginate(db.volunteeropportunities, cursor=cursor, limit=limit)
+    return {"opportunities": items, "next_cursor": next_cursor}
 
 # -------- GET ONE (admin only) ----------
 @router.get("/{opportunity_id}", status_code=200)
-async def get_opportunity(opportunity_id: str, current_user: Annotated[User, Depends(get_current_user)]):
+async def get_opportunity(opportunity_id: str, current_user: Annotated[Principal, Depends(get_current_principal)]):
     enforce_authentication(current_user); enforce_admin(current_user)
     opp = await db.volunteeropportunities.find_unique(where={"id": opportunity_id})
     if not opp:
@@ -327,7 +331,7 @@ async def get_opportunity(opportunity_id: str, current_user: Annotated[User, Dep
 
 # -------- GET applications by opportunity (admin) ----------
 @router.get("/{opportunity_id}/applications", status_code=200)
-async def applications_by_opportunity(opportunity_id: str, current_user: Annotated[User, Depends(get_current_user)]):
+async def applications_by_opportunity(opportunity_id: str, current_user: Annotated[Principal, Depends(get_current_principal)]):
     enforce_authentication(current_user); enforce_admin(current_user)
     vols = await db.volunteers.find_many(where={"volunteerOpportunityIDs": {"has": opportunity_id}})
     return {"volunteers": vols}
@@ -335,7 +339,7 @@ async def applications_by_opportunity(opportunity_id: str, current_user: Annotat
 # -------- CREATE (admin only) ----------
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_volunteer_opportunity(
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     opportunity_data: VolunteerOpportunityCreate
 ):
     enforce_authentication(current_user); enforce_admin(current_user)
@@ -348,7 +352,7 @@ async def create_volunteer_opportunity(
 @router.patch("/{opportunity_id}", status_code=200)
 async def update_opportunity(
     opportunity_id: str,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     opportunity_data: VolunteerOpportunityUpdate
 ):
     enforce_authentication(current_user); enforce_admin(current_user)
@@ -362,7 +366,7 @@ async def update_opportunity(
 
 # -------- DELETE (admin only) ----------
 @router.delete("/{opportunity_id}", status_code=200)
-async def delete_opportunity(opportunity_id: str, current_user: Annotated[User, Depends(get_current_user)]):
+async def delete_opportunity(opportunity_id: str, current_user: Annotated[Principal, Depends(get_current_principal)]):
     enforce_authentication(current_user); enforce_admin(current_user)
     exists = await db.volunteeropportunities.find_unique(where={"id": opportunity_id})
     if not exists:
@@ -373,7 +377,7 @@ async def delete_opportunity(opportunity_id: str, current_user: Annotated[User,
 
 # -------- ADD volunteer to opportunity (admin) ----------
 @router.post("/{opportunity_id}/volunteers/{volunteer_id}", status_code=200)
-async def enroll_volunteer(opportunity_id: str, volunteer_id: str, current_user: Annotated[User, Depends(get_current_user)]):
+async def enroll_volunteer(opportunity_id: str, volunteer_id: str, current_user: Annotated[Principal, Depends(get_current_principal)]):
     enforce_authentication(current_user); enforce_admin(current_user)
 
     opp = await db.volunteeropportunities.find_unique(where={"id": opportunity_id})
@@ -391,7 +395,7 @@ async def enroll_volunteer(opportunity_id: str, volunteer_id: str, current_user:
 
 # -------- REMOVE volunteer from opportunity (admin) ----------
 @router.delete("/{opportunity_id}/volunteers/{volunteer_id}", status_code=200)
-async def remove_volunteer_from_opportunity(opportunity_id: str, volunteer_id: str, current_user: Annotated[User, Depends(get_current_user)]):
+async def remove_volunteer_from_opportunity(opportunity_id: str, volunteer_id: str, current_user: Annotated[Principal, Depends(get_current_principal)]):
     enforce_authentication(current_user); enforce_admin(current_user)
 
     opp = await db.volunteeropportunities.find_unique(where={"id": opportunity_id})
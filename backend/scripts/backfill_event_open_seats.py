@@ -0,0 +1,37 @@
+"""
+    One-off backfill for Events.openSeats
+
+    openSeats is always limit - participants, unclamped, so the deltas the
+    routes apply stay exact when a limit is lowered below participants.
+
+    Run from the ROOT directory after `prisma db push`:
+
+        python -m backend.scripts.backfill_event_open_seats
+"""
+from backend.db.prisma_client import db
+import asyncio
+
+
+async def backfill_open_seats():
+    await db.connect()
+    updated = 0
+    try:
+        events = await db.events.find_many()
+        for event in events:
+            open_seats = event.limit - event.participants
+            if event.openSeats == open_seats:
+                continue
+
+            await db.events.update(
+                where={"id": event.id},
+                data={"openSeats": open_seats}
+            )
+            updated += 1
+    finally:
+        await db.disconnect()
+
+    print(f"Backfilled openSeats on {updated} event(s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_open_seats())
@@ -0,0 +1,55 @@
+"""
+    Recompute Users.unreadNotifications and Users.readBroadcasts from the
+    notifications and broadcast receipts collections
+
+    Run from the ROOT directory after `prisma db push`, and again whenever
+    the counters need repairing:
+
+        python -m backend.scripts.backfill_unread_notifications
+"""
+from backend.db.prisma_client import db
+from backend.routers.audience import iter_user_batches
+from prisma.partials import UserInbox
+from collections import Counter
+import asyncio
+
+
+async def backfill_unread_notifications():
+    await db.connect()
+    updated = 0
+    try:
+        unread = await db.notifications.group_by(
+            by=["userId"],
+            where={"isRead": False},
+            count={"_all": True}
+        )
+        counts = Counter({row["userId"]: row["_count"]["_all"] for row in unread})
+
+        receipts = await db.broadcastreceipts.group_by(
+            by=["userId"],
+            count={"_all": True}
+        )
+        read = Counter({row["userId"]: row["_count"]["_all"] for row in receipts})
+
+        async for users in iter_user_batches(UserInbox):
+            for user in users:
+                data = {
+                    "unreadNotifications": counts.get(user.id, 0),
+                    "readBroadcasts": read.get(user.id, 0)
+                }
+                if user.unreadNotifications == data["unreadNotifications"] and user.readBroadcasts == data["readBroadcasts"]:
+                    continue
+
+                await db.users.update(
+                    where={"id": user.id},
+                    data=data
+                )
+                updated += 1
+    finally:
+        await db.disconnect()
+
+    print(f"Backfilled notification counters on {updated} user(s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_unread_notifications())
@@ -0,0 +1,44 @@
+"""
+    Render benchmark for every registered email / notification template
+
+    Run from the ROOT directory:
+
+        python -m backend.scripts.bench_message_templates --renders 10000
+
+    Reports per-template cost of a cold render (no cache) and of a cached
+    render, which is what a batch sharing one context pays per recipient.
+"""
+from backend.routers.message_templates import templates, render
+from dataclasses import fields
+import argparse
+import time
+
+
+def sample_context(context_type):
+    return context_type(**{field.name: f"sample {field.name}" for field in fields(context_type)})
+
+
+def bench(renders: int):
+    print(f"{'template':<22} {'cold us':>10} {'cached us':>10}")
+    for key, template in templates.items():
+        context = sample_context(template.context_type)
+
+        started_at = time.perf_counter()
+        for _ in range(renders):
+            template.render(context)
+        cold = (time.perf_counter() - started_at) / renders
+
+        render.cache_clear()
+        started_at = time.perf_counter()
+        for _ in range(renders):
+            render(key, context)
+        cached = (time.perf_counter() - started_at) / renders
+
+        print(f"{key:<22} {cold * 1e6:>10.2f} {cached * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=10000)
+    args = parser.parse_args()
+    bench(args.renders)
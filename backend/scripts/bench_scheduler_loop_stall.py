@@ -0,0 +1,142 @@
+"""
+    Event-loop stall benchmark for scheduling reminders under concurrent enrollments
+
+    Compares the old path, where every enrollment called scheduler.add_job on
+    an APScheduler MongoDBJobStore backed by a synchronous pymongo client,
+    with the current one, where schedule_reminder only writes the Jobs row
+    through the async Prisma client.
+
+    Run from the ROOT directory against a development database:
+
+        python -m backend.scripts.bench_scheduler_loop_stall --enrollments 1000
+
+    Both modes only touch scratch data (the apscheduler collection
+    `bench_scheduler_jobs` and Jobs rows for throwaway event IDs dated far in
+    the future) and remove it afterwards.
+"""
+from backend.db.prisma_client import db
+from backend.routers.notifications import schedule_reminder
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.jobstores.mongodb import MongoDBJobStore
+from bson import ObjectId
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from pymongo import MongoClient
+import argparse
+import asyncio
+import os
+import time
+
+load_dotenv()
+
+FAR_FUTURE = datetime(2100, 1, 1, tzinfo=timezone.utc)
+
+
+class LoopStallProbe:
+    """
+        Ticks every `interval` seconds and records how late each tick wakes up
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stalls = []
+        self._task = None
+
+    async def _tick(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.stalls.append(max(time.perf_counter() - expected, 0.0))
+
+    async def start(self):
+        self._task = asyncio.create_task(self._tick())
+        await asyncio.sleep(0)
+
+    async def stop(self):
+        # Let the tick that was due during the last stall record it
+        await asyncio.sleep(self.interval * 2)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def report(self) -> dict:
+        stalls = sorted(self.stalls)
+        count = len(stalls)
+        return {
+            "ticks": count,
+            "maxStallMs": stalls[-1] * 1000 if count else 0.0,
+            "p99StallMs": stalls[int(count * 0.99) - 1] * 1000 if count > 1 else 0.0,
+            "totalStallMs": sum(stalls) * 1000
+        }
+
+
+def noop_reminder():
+    pass
+
+
+async def measure(label: str, enroll, enrollments: int):
+    probe = LoopStallProbe()
+    await probe.start()
+    started_at = time.perf_counter()
+    await asyncio.gather(*(enroll(i) for i in range(enrollments)))
+    elapsed = time.perf_counter() - started_at
+    await probe.stop()
+
+    print(f"{label}: {enrollments} enrollments in {elapsed * 1000:.0f} ms, {probe.report()}")
+
+
+async def bench_mongodb_jobstore(enrollments: int):
+    """
+        Old path: one MongoDBJobStore insert per enrollment, on the event loop
+    """
+    client = MongoClient(os.getenv("DATABASE_URL"))
+    jobstore = MongoDBJobStore(
+        client=client,
+        database=os.getenv("DATABASE_NAME"),
+        collection="bench_scheduler_jobs"
+    )
+    scheduler = AsyncIOScheduler(jobstores={"default": jobstore})
+    scheduler.start(paused=True)
+
+    async def enroll(i):
+        scheduler.add_job(noop_reminder, trigger="date", run_date=FAR_FUTURE, id=f"bench-{i}")
+
+    try:
+        await measure("MongoDBJobStore (sync pymongo)", enroll, enrollments)
+    finally:
+        scheduler.remove_all_jobs()
+        scheduler.shutdown(wait=False)
+        client.close()
+
+
+async def bench_jobs_collection(enrollments: int):
+    """
+        Current path: schedule_reminder writes the Jobs row through async Prisma
+    """
+    event_ids = [str(ObjectId()) for _ in range(enrollments)]
+
+    async def enroll(i):
+        await schedule_reminder(event_ids[i], FAR_FUTURE)
+
+    try:
+        await measure("Jobs collection (async prisma)", enroll, enrollments)
+    finally:
+        await db.jobs.delete_many(where={"eventId": {"in": event_ids}})
+
+
+async def run(enrollments: int):
+    await db.connect()
+    try:
+        await bench_mongodb_jobstore(enrollments)
+        await bench_jobs_collection(enrollments)
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--enrollments", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.enrollments))
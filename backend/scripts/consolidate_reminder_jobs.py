@@ -0,0 +1,43 @@
+"""
+    One-off cleanup collapsing per-enrollment reminder Jobs to one per event
+
+    The Jobs @@unique([eventId, jobType, reminderType]) index cannot be built
+    while duplicates exist, so run this from the ROOT directory BEFORE
+    `prisma db push`:
+
+        python -m backend.scripts.consolidate_reminder_jobs
+
+    For each (event, job type, reminder type) the earliest pending job is
+    kept, or the most recent one if none are pending. The Jobs sweeper
+    picks up the kept pending jobs on its own.
+"""
+from backend.db.prisma_client import db
+import asyncio
+
+
+async def consolidate_reminder_jobs():
+    await db.connect()
+    removed = 0
+    try:
+        groups = {}
+        for job in await db.jobs.find_many(order={"runAt": "asc"}):
+            groups.setdefault((job.eventId, job.jobType, job.reminderType), []).append(job)
+
+        for jobs in groups.values():
+            if len(jobs) == 1:
+                continue
+
+            pending = [job for job in jobs if job.status == "pending"]
+            keep = pending[0] if pending else jobs[-1]
+
+            removed += await db.jobs.delete_many(
+                where={"id": {"in": [job.id for job in jobs if job.id != keep.id]}}
+            )
+    finally:
+        await db.disconnect()
+
+    print(f"Removed {removed} duplicate reminder job(s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(consolidate_reminder_jobs())
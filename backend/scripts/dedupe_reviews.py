@@ -0,0 +1,50 @@
+"""
+    One-off cleanup leaving one review per parent per event
+
+    The Reviews @@unique([eventId, parentId]) index cannot be built while
+    duplicates exist, so run this from the ROOT directory BEFORE
+    `prisma db push`:
+
+        python -m backend.scripts.dedupe_reviews
+
+    For each (event, parent) the most recently written review is kept. The
+    review aggregates are rebuilt afterwards to drop the removed ratings.
+"""
+from backend.db.prisma_client import db
+from backend.routers.review_stats import recompute_review_stats
+import asyncio
+
+
+async def dedupe_reviews():
+    await db.connect()
+    removed = 0
+    try:
+        pairs = await db.reviews.group_by(
+            by=["eventId", "parentId"],
+            count={"_all": True}
+        )
+
+        for pair in pairs:
+            if pair["_count"]["_all"] < 2:
+                continue
+
+            reviews = await db.reviews.find_many(
+                where={"eventId": pair["eventId"], "parentId": pair["parentId"]},
+                order={"createdAt": "desc"}
+            )
+            keep = max(reviews, key=lambda review: review.updatedAt or review.createdAt)
+
+            removed += await db.reviews.delete_many(
+                where={"id": {"in": [review.id for review in reviews if review.id != keep.id]}}
+            )
+
+        if removed:
+            await recompute_review_stats()
+    finally:
+        await db.disconnect()
+
+    print(f"Removed {removed} duplicate review(s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(dedupe_reviews())
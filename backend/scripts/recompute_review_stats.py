@@ -0,0 +1,27 @@
+"""
+    Rebuild the review aggregates (count, sum, per-star counts, mean) on
+    Events and Activities from the reviews collection
+
+    Run from the ROOT directory after `prisma db push`, and again whenever
+    the aggregates need repairing (the worker also runs this every
+    REVIEW_STATS_REFRESH_SECONDS):
+
+        python -m backend.scripts.recompute_review_stats
+"""
+from backend.db.prisma_client import db
+from backend.routers.review_stats import recompute_review_stats
+import asyncio
+
+
+async def run():
+    await db.connect()
+    try:
+        updated = await recompute_review_stats()
+    finally:
+        await db.disconnect()
+
+    print(f"Recomputed review aggregates on {updated} event(s)/activity(ies)")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,34 @@
+from backend.db.geo_index import EventGeoIndex, haversine_km
+from unittest import TestCase
+import random
+
+
+class EventGeoIndexTest(TestCase):
+
+    def test_finds_events_across_the_antimeridian(self):
+        index = EventGeoIndex(cell_degrees=0.25)
+        index.upsert("east", 0.0, 179.95)
+        index.upsert("west", 0.0, -179.95)
+        index.upsert("far", 0.0, 170.0)
+
+        self.assertEqual([event_id for event_id, _ in index.within_radius(0.0, 179.99, 20)], ["east", "west"])
+        self.assertEqual([event_id for event_id, _ in index.within_radius(0.0, -179.99, 20)], ["west", "east"])
+
+    def test_finds_events_across_a_pole(self):
+        index = EventGeoIndex()
+        index.upsert("a", 89.9, 0.0)
+        index.upsert("b", 89.9, 180.0)
+
+        self.assertEqual(len(index.within_radius(89.95, 90.0, 30)), 2)
+
+    def test_matches_a_full_scan(self):
+        rng = random.Random(1)
+        index = EventGeoIndex(cell_degrees=0.7)
+        points = [(str(i), rng.uniform(-89, 89), rng.uniform(-180, 180)) for i in range(2000)]
+        for point in points:
+            index.upsert(*point)
+
+        for _ in range(100):
+            lat, lon, radius = rng.uniform(-85, 85), rng.uniform(-180, 180), rng.uniform(1, 3000)
+            expected = {event_id for event_id, point_lat, point_lon in points if haversine_km(lat, lon, point_lat, point_lon) <= radius}
+            self.assertEqual({event_id for event_id, _ in index.within_radius(lat, lon, radius)}, expected)
@@ -0,0 +1,116 @@
+"""
+    SMTPPool against a stub smtplib.SMTP; no network or SMTP server needed
+
+    Run from the ROOT directory:
+
+        python -m unittest discover backend/tests
+"""
+from backend.routers import mailer as mailer_module
+from backend.routers.mailer import SMTPPool
+from unittest import IsolatedAsyncioTestCase, mock
+import smtplib
+
+
+class StubSMTP:
+    """
+        Records connections and sends; each send_message pops the next
+        scripted outcome (None = accepted, or an exception to raise)
+    """
+    connections = []
+    outcomes = []
+
+    def __init__(self, host, port, timeout=None):
+        self.sent = []
+        self.closed = False
+        StubSMTP.connections.append(self)
+
+    def send_message(self, message):
+        outcome = StubSMTP.outcomes.pop(0) if StubSMTP.outcomes else None
+        if outcome is not None:
+            raise outcome
+        self.sent.append(message["To"])
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+class SMTPPoolTest(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        StubSMTP.connections = []
+        StubSMTP.outcomes = []
+        patcher = mock.patch.object(mailer_module.smtplib, "SMTP", StubSMTP)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = SMTPPool(host="localhost", port=1025, username=None, password=None, use_ssl=False, pool_size=1)
+
+    def sent(self) -> list:
+        return [to for conn in StubSMTP.connections for to in conn.sent]
+
+    async def test_reuses_the_pooled_connection(self):
+        await self.pool.send("a@example.com", "s", "c")
+        await self.pool.send("b@example.com", "s", "c")
+
+        self.assertEqual(len(StubSMTP.connections), 1)
+        self.assertEqual(self.sent(), ["a@example.com", "b@example.com"])
+
+    async def test_recipient_refused_is_not_resent(self):
+        StubSMTP.outcomes = [smtplib.SMTPRecipientsRefused({"bad@example.com": (550, b"No such user")})]
+
+        with self.assertRaises(smtplib.SMTPRecipientsRefused):
+            await self.pool.send("bad@example.com", "s", "c")
+        await self.pool.send("good@example.com", "s", "c")
+
+        self.assertEqual(len(StubSMTP.connections), 1)
+        self.assertFalse(StubSMTP.connections[0].closed)
+        self.assertEqual(self.sent(), ["good@example.com"])
+        self.assertEqual(self.pool.stats()["reconnects"], 0)
+        self.assertEqual(self.pool.stats()["failed"], 1)
+
+    async def test_permanent_data_error_is_not_resent(self):
+        StubSMTP.outcomes = [smtplib.SMTPDataError(550, b"Rejected")]
+
+        with self.assertRaises(smtplib.SMTPDataError):
+            await self.pool.send("a@example.com", "s", "c")
+
+        self.assertEqual(len(StubSMTP.connections), 1)
+        self.assertEqual(self.pool.stats()["reconnects"], 0)
+
+    async def test_other_smtp_errors_drop_the_connection_without_resending(self):
+        StubSMTP.outcomes = [smtplib.SMTPResponseException(421, b"Service not available")]
+
+        with self.assertRaises(smtplib.SMTPResponseException):
+            await self.pool.send("a@example.com", "s", "c")
+
+        self.assertTrue(StubSMTP.connections[0].closed)
+        self.assertEqual(self.pool.stats()["reconnects"], 0)
+
+    async def test_dropped_connection_is_reopened_once(self):
+        StubSMTP.outcomes = [smtplib.SMTPServerDisconnected("gone")]
+
+        await self.pool.send("a@example.com", "s", "c")
+
+        self.assertEqual(len(StubSMTP.connections), 2)
+        self.assertTrue(StubSMTP.connections[0].closed)
+        self.assertEqual(self.sent(), ["a@example.com"])
+        self.assertEqual(self.pool.stats()["reconnects"], 1)
+
+    async def test_socket_error_is_retried_once_then_raised(self):
+        StubSMTP.outcomes = [ConnectionResetError("reset"), ConnectionResetError("reset")]
+
+        with self.assertRaises(ConnectionResetError):
+            await self.pool.send("a@example.com", "s", "c")
+
+        self.assertEqual(len(StubSMTP.connections), 2)
+        self.assertEqual(self.sent(), [])
+        self.assertEqual(self.pool.stats()["failed"], 1)
+
+    async def test_ready_check_can_skip_the_send(self):
+        async def not_ready():
+            return False
+
+        self.assertFalse(await self.pool.send("a@example.com", "s", "c", ready=not_ready))
+        self.assertEqual(StubSMTP.connections, [])
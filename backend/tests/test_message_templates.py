@@ -0,0 +1,17 @@
+from backend.routers.message_templates import AnnouncementContext, EventContext, render
+from unittest import TestCase
+
+
+class RenderTest(TestCase):
+
+    def test_multiline_values_become_paragraphs_in_html(self):
+        message = render("announcement", AnnouncementContext(title="News", description="Line one\n\nLine two\nthree"))
+
+        self.assertIn("<p>Line one</p><p>Line two<br>three</p>", message.html)
+        self.assertIn("Line one\n\nLine two\nthree", message.text)
+
+    def test_values_are_escaped_in_html_only(self):
+        message = render("event_cancelled", EventContext(event_name="Arts & <Crafts>", event_date="May 1"))
+
+        self.assertIn("Arts &amp; &lt;Crafts&gt;", message.html)
+        self.assertIn("Arts & <Crafts>", message.text)
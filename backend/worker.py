@@ -0,0 +1,56 @@
+"""
+    Background worker process: Jobs sweeps (reminders) and email outbox delivery
+
+    Run from the ROOT directory, as many processes as the mail volume needs:
+
+        python -m backend.worker
+
+    The API only writes Jobs and EmailOutbox documents; workers claim them
+    with leases, so any number of worker processes can run side by side.
+"""
+from backend.db.prisma_client import db
+from backend.routers.notifications import start_scheduler, scheduler
+from backend.routers.mailer import mailer
+from backend.routers.outbox import outbox_stats
+from dotenv import load_dotenv
+import asyncio
+import logging
+import os
+import signal
+
+load_dotenv()
+WORKER_STATS_SECONDS = float(os.getenv("WORKER_STATS_SECONDS", "300"))
+
+
+def log_worker_stats():
+    logging.info(f"Outbox: {outbox_stats.as_dict()} SMTP: {mailer.stats()}")
+
+
+async def run_worker():
+    await db.connect()
+    scheduler.add_job(
+        func=log_worker_stats,
+        trigger="interval",
+        seconds=WORKER_STATS_SECONDS,
+        id="worker-stats",
+        replace_existing=True
+    )
+    start_scheduler()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    logging.info("Worker started; waiting for jobs and outbox messages")
+    try:
+        await stop.wait()
+    finally:
+        scheduler.shutdown(wait=False)
+        await asyncio.to_thread(mailer.close)
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker())